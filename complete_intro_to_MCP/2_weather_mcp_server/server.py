@@ -1,65 +1,336 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
 import httpx
 from fastmcp import FastMCP
+from pydantic import BaseModel
+
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+# Seconds to wait for open-meteo before giving up on a call
+TIMEOUT = float(os.getenv("WEATHER_TIMEOUT", "10"))
+# Most locations get_weather_batch accepts, and sends in one request
+MAX_BATCH_LOCATIONS = 100
+
+UNIT_PARAMS = {
+    "wind_speed_unit": "mph",
+    "temperature_unit": "fahrenheit",
+    "precipitation_unit": "inch",
+}
+CURRENT_PARAMS = {
+    "current": [
+        "temperature_2m",
+        "relative_humidity_2m",
+        "apparent_temperature",
+        "is_day",
+        "precipitation",
+        "rain",
+        "wind_speed_10m",
+    ],
+    **UNIT_PARAMS,
+}
+# Hourly variables returned when a series tool isn't given any
+DEFAULT_HOURLY = [
+    "temperature_2m",
+    "relative_humidity_2m",
+    "precipitation",
+    "wind_speed_10m",
+]
+
+# Coordinates are snapped to cells of this many degrees (0.01 is about 1 km)
+GRID_DEGREES = float(os.getenv("WEATHER_GRID_DEGREES", "0.01"))
+# Cached cells, least recently used are evicted first
+CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "1024"))
+# Used when the response doesn't say when the next update is due
+DEFAULT_TTL = 900
+MIN_TTL = 60
+
+# (lat cell, lon cell) -> (expires_at, normalized weather)
+weather_cache = OrderedDict()
+# Cells currently being fetched, shared by concurrent calls for the same cell
+pending_fetches = {}
+
+# One pooled client for every call, closed when the server shuts down
+client = None
+lifespan_users = 0
+
+
+def get_client() -> httpx.AsyncClient:
+    global client
+
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=httpx.Timeout(TIMEOUT, connect=min(TIMEOUT, 5.0)),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return client
+
+
+@asynccontextmanager
+async def lifespan(server):
+    global lifespan_users
+
+    lifespan_users += 1
+    try:
+        yield
+    finally:
+        # HTTP transports run a lifespan per session, so only the last one closes
+        lifespan_users -= 1
+        if lifespan_users == 0 and client is not None:
+            await client.aclose()
+
+
+mcp = FastMCP(name="weather-server", lifespan=lifespan)
+
+
+class Location(BaseModel):
+    latitude: float
+    longitude: float
+
+
+def grid_cell(latitude: float, longitude: float) -> tuple:
+    return round(latitude / GRID_DEGREES), round(longitude / GRID_DEGREES)
+
+
+def expires_at(current: dict) -> float:
+    """When open-meteo publishes the next value after this `current` block"""
+    now = time.time()
+    try:
+        # `time` starts the update interval, in GMT unless a timezone was asked for
+        started = datetime.fromisoformat(current["time"]).replace(tzinfo=timezone.utc)
+        next_update = started.timestamp() + current["interval"]
+    except (KeyError, TypeError, ValueError):
+        return now + DEFAULT_TTL
+    return max(next_update, now + MIN_TTL)
+
+
+def normalize(current: dict) -> dict:
+    return {
+        "temperature": {
+            "current": current["temperature_2m"],
+            "feelsLike": current["apparent_temperature"],
+            "unit": "fahrenheit",
+        },
+        "humidity": {
+            "value": current["relative_humidity_2m"],
+            "unit": "percent",
+        },
+        "wind": {
+            "speed": current["wind_speed_10m"],
+            "unit": "mph",
+        },
+        "precipitation": {
+            "total": current["precipitation"],
+            "rain": current["rain"],
+            "unit": "inches",
+        },
+        "conditions": {
+            "isDay": current["is_day"] == 1,
+            "dayNight": "day" if current["is_day"] == 1 else "night",
+        },
+    }
+
+
+def cache_weather(cell: tuple, current: dict) -> dict:
+    weather = normalize(current)
+    weather_cache[cell] = (expires_at(current), weather)
+    weather_cache.move_to_end(cell)
+    while len(weather_cache) > CACHE_SIZE:
+        weather_cache.popitem(last=False)
+    return weather
+
+
+def cached_weather(cell: tuple):
+    cached = weather_cache.get(cell)
+    if cached is not None and cached[0] > time.time():
+        weather_cache.move_to_end(cell)
+        return cached[1]
+    return None
+
+
+async def fetch_weather(cells: list) -> list:
+    """Current weather for several cells in one open-meteo request"""
+    params = {
+        **CURRENT_PARAMS,
+        # The centre of each cell, so every point in it gets the same answer
+        "latitude": ",".join(str(round(lat * GRID_DEGREES, 6)) for lat, _ in cells),
+        "longitude": ",".join(str(round(lon * GRID_DEGREES, 6)) for _, lon in cells),
+    }
+
+    response = await get_client().get(FORECAST_URL, params=params)
+    response.raise_for_status()
+    data = response.json()
+
+    # Several coordinates come back as a list in the same order
+    if isinstance(data, dict):
+        data = [data]
+    return [cache_weather(cell, item["current"]) for cell, item in zip(cells, data)]
+
 
-mcp = FastMCP(name="weather-server")
+async def pick(task: asyncio.Future, index: int) -> dict:
+    return (await task)[index]
+
+
+def start_fetch(cells: list) -> None:
+    """Fetch cells in one request, letting other calls wait on each of them"""
+    task = asyncio.ensure_future(fetch_weather(cells))
+    for index, cell in enumerate(cells):
+        cell_task = asyncio.ensure_future(pick(task, index))
+        pending_fetches[cell] = cell_task
+        cell_task.add_done_callback(
+            lambda _, cell=cell: pending_fetches.pop(cell, None)
+        )
+
+
+async def current_weather(cell: tuple) -> dict:
+    weather = cached_weather(cell)
+    if weather is not None:
+        return weather
+
+    if cell not in pending_fetches:
+        start_fetch([cell])
+
+    # Shielded so one caller giving up doesn't cancel the fetch for the others
+    return await asyncio.shield(pending_fetches[cell])
+
+
+def error_result(error: Exception) -> dict:
+    if isinstance(error, httpx.TimeoutException):
+        return {"error": f"Weather service didn't respond within {TIMEOUT:g}s"}
+    if isinstance(error, httpx.HTTPStatusError):
+        # open-meteo explains bad parameters in a "reason" field
+        try:
+            reason = error.response.json().get("reason")
+        except ValueError:
+            reason = None
+        if reason:
+            return {"error": f"Error fetching weather data: {reason}"}
+    return {"error": f"Error fetching weather data: {str(error)}"}
+
+
+async def fetch_hourly(url: str, params: dict, max_points: int | None) -> dict:
+    """Hourly series as one array per variable sharing a time axis"""
+    if max_points is not None and max_points < 1:
+        return {"error": "max_points must be at least 1"}
+
+    variables = params["hourly"]
+    response = await get_client().get(url, params={**params, **UNIT_PARAMS})
+    response.raise_for_status()
+    data = response.json()
+
+    hourly = data["hourly"]
+    # Keep every step-th hour when there are more points than asked for
+    step = 1
+    if max_points and len(hourly["time"]) > max_points:
+        step = math.ceil(len(hourly["time"]) / max_points)
+
+    return {
+        "latitude": data.get("latitude"),
+        "longitude": data.get("longitude"),
+        "stepHours": step,
+        "units": {name: data["hourly_units"][name] for name in variables},
+        "time": hourly["time"][::step],
+        "series": {name: hourly[name][::step] for name in variables},
+    }
 
 
 @mcp.tool
-def get_weather(latitude: float, longitude: float) -> dict:
+async def get_weather(latitude: float, longitude: float) -> dict:
     """Get current weather data for a given latitude and longitude."""
     try:
-        params = {
-            "latitude": latitude,
-            "longitude": longitude,
-            "current": [
-                "temperature_2m",
-                "relative_humidity_2m",
-                "apparent_temperature",
-                "is_day",
-                "precipitation",
-                "rain",
-                "wind_speed_10m",
-            ],
-            "wind_speed_unit": "mph",
-            "temperature_unit": "fahrenheit",
-            "precipitation_unit": "inch",
-        }
-
-        url = "https://api.open-meteo.com/v1/forecast"
-
-        with httpx.Client() as client:
-            response = client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-
-        current = data["current"]
-
-        return {
-            "temperature": {
-                "current": current["temperature_2m"],
-                "feelsLike": current["apparent_temperature"],
-                "unit": "fahrenheit",
-            },
-            "humidity": {
-                "value": current["relative_humidity_2m"],
-                "unit": "percent",
-            },
-            "wind": {
-                "speed": current["wind_speed_10m"],
-                "unit": "mph",
-            },
-            "precipitation": {
-                "total": current["precipitation"],
-                "rain": current["rain"],
-                "unit": "inches",
-            },
-            "conditions": {
-                "isDay": current["is_day"] == 1,
-                "dayNight": "day" if current["is_day"] == 1 else "night",
-            },
-        }
+        return await current_weather(grid_cell(latitude, longitude))
+    except Exception as error:
+        return error_result(error)
+
+
+@mcp.tool
+async def get_weather_batch(locations: list[Location]) -> list[dict]:
+    """Get current weather for several locations at once.
+
+    Returns one result per location, in the same order and shape as get_weather.
+    More than 100 locations gives every location an error result.
+    """
+    if len(locations) > MAX_BATCH_LOCATIONS:
+        error = {"error": f"At most {MAX_BATCH_LOCATIONS} locations per call"}
+        return [error] * len(locations)
+
+    cells = [grid_cell(location.latitude, location.longitude) for location in locations]
+
+    # Everything not cached or already being fetched goes out in one request
+    missing = [
+        cell
+        for cell in dict.fromkeys(cells)
+        if cell not in pending_fetches and cached_weather(cell) is None
+    ]
+    if missing:
+        start_fetch(missing)
+
+    results = await asyncio.gather(
+        *(current_weather(cell) for cell in cells), return_exceptions=True
+    )
+    return [
+        error_result(result) if isinstance(result, Exception) else result
+        for result in results
+    ]
+
+
+@mcp.tool
+async def get_hourly_forecast(
+    latitude: float,
+    longitude: float,
+    days: int = 2,
+    variables: list[str] | None = None,
+    max_points: int | None = None,
+) -> dict:
+    """Get an hourly weather forecast for a given latitude and longitude.
+
+    Returns a shared "time" axis and one array per variable under "series".
+    days is 1-16, variables are open-meteo hourly variable names (default:
+    temperature, humidity, precipitation and wind speed), and max_points
+    downsamples long series by keeping every n-th hour.
+    """
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "hourly": variables or DEFAULT_HOURLY,
+        "forecast_days": max(1, min(days, 16)),
+    }
+    try:
+        return await fetch_hourly(FORECAST_URL, params, max_points)
+    except Exception as error:
+        return error_result(error)
+
+
+@mcp.tool
+async def get_weather_history(
+    latitude: float,
+    longitude: float,
+    start_date: str,
+    end_date: str,
+    variables: list[str] | None = None,
+    max_points: int | None = None,
+) -> dict:
+    """Get hourly historical weather for a given latitude and longitude.
+
+    Dates are YYYY-MM-DD (inclusive). Returns the same columnar shape as
+    get_hourly_forecast; use max_points to downsample multi-week ranges.
+    """
+    params = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "hourly": variables or DEFAULT_HOURLY,
+        "start_date": start_date,
+        "end_date": end_date,
+    }
+    try:
+        return await fetch_hourly(ARCHIVE_URL, params, max_points)
     except Exception as error:
-        return {"error": f"Error fetching weather data: {str(error)}"}
+        return error_result(error)
 
 
 if __name__ == "__main__":
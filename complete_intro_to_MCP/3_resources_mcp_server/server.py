@@ -1,33 +1,55 @@
 #!/usr/bin/env python3
 
+import asyncio
 import sqlite3
 from pathlib import Path
 
 from fastmcp import FastMCP
+from pydantic import AnyUrl
 
 # Create FastMCP server
 mcp = FastMCP("issues-server", version="1.0.0")
 
+# Use the database from the mcp-issue-tracker backend
+DB_PATH = (
+    Path(__file__).parent.parent / "mcp-issue-tracker" / "backend" / "database.sqlite"
+)
+SCHEMA_URI = "schema://database"
+# Seconds between schema change checks while a client is subscribed
+SCHEMA_POLL_INTERVAL = 5
 
-@mcp.resource("schema://database")
-async def database_schema() -> str:
-    """Register the database schema resource"""
-    # Use the database from the mcp-issue-tracker backend
-    db_path = (
-        Path(__file__).parent.parent
-        / "mcp-issue-tracker"
-        / "backend"
-        / "database.sqlite"
+# (file stamp, schema_version, schema) of the last read
+schema_cache = None
+# Sessions subscribed to schema://database
+schema_subscribers = set()
+schema_watcher = None
+
+
+def file_stamp() -> tuple:
+    # In WAL mode changes land in the -wal file before the database file
+    wal = DB_PATH.with_name(DB_PATH.name + "-wal")
+    return (
+        DB_PATH.stat().st_mtime_ns,
+        wal.stat().st_mtime_ns if wal.exists() else None,
     )
 
-    if not db_path.exists():
-        raise FileNotFoundError(f"Database file not found at {db_path}")
+
+def read_schema(cached):
+    """Re-read the schema unless the file and schema_version are unchanged"""
+    stamp = file_stamp()
+    if cached is not None and cached[0] == stamp:
+        return cached
 
     # Connect to database and extract schema in read-only mode
-    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
     cursor = conn.cursor()
 
     try:
+        # Data writes change the file too, only DDL bumps schema_version
+        version = cursor.execute("PRAGMA schema_version").fetchone()[0]
+        if cached is not None and cached[1] == version:
+            return stamp, version, cached[2]
+
         cursor.execute(
             "SELECT sql FROM sqlite_master WHERE type='table' AND sql IS NOT NULL ORDER BY name"
         )
@@ -35,11 +57,90 @@ async def database_schema() -> str:
 
         # Join all SQL statements with newlines and semicolons
         schema = "\n".join([row[0] + ";" for row in rows])
-        return schema
+        return stamp, version, schema
 
     finally:
         conn.close()
 
 
+def current_schema() -> str:
+    global schema_cache
+
+    if not DB_PATH.exists():
+        raise FileNotFoundError(f"Database file not found at {DB_PATH}")
+
+    # Only goes back to sqlite_master when the schema has changed
+    schema_cache = read_schema(schema_cache)
+    return schema_cache[2]
+
+
+@mcp.resource(SCHEMA_URI)
+async def database_schema() -> str:
+    """Register the database schema resource"""
+    return current_schema()
+
+
+async def watch_schema():
+    """Send resources/updated to subscribers whenever the schema changes"""
+    global schema_cache, schema_watcher
+
+    try:
+        while schema_subscribers:
+            await asyncio.sleep(SCHEMA_POLL_INTERVAL)
+            previous = schema_cache
+            try:
+                schema_cache = await asyncio.to_thread(read_schema, previous)
+            except (OSError, sqlite3.Error):
+                continue
+            if previous is None or schema_cache[2] == previous[2]:
+                continue
+
+            for session in list(schema_subscribers):
+                try:
+                    await session.send_resource_updated(AnyUrl(SCHEMA_URI))
+                except Exception:
+                    # The client went away
+                    schema_subscribers.discard(session)
+    finally:
+        schema_watcher = None
+
+
+# FastMCP has no subscription API, so register on the underlying MCP server
+@mcp._mcp_server.subscribe_resource()
+async def subscribe(uri: AnyUrl) -> None:
+    global schema_watcher
+
+    if str(uri) != SCHEMA_URI:
+        return
+    schema_subscribers.add(mcp._mcp_server.request_context.session)
+    if schema_cache is None:
+        try:
+            await asyncio.to_thread(current_schema)
+        except (OSError, sqlite3.Error):
+            pass
+    if schema_watcher is None:
+        schema_watcher = asyncio.create_task(watch_schema())
+
+
+@mcp._mcp_server.unsubscribe_resource()
+async def unsubscribe(uri: AnyUrl) -> None:
+    if str(uri) == SCHEMA_URI:
+        schema_subscribers.discard(mcp._mcp_server.request_context.session)
+
+
+def get_capabilities(*args, **kwargs):
+    # The MCP SDK always advertises resources.subscribe=False, so without this
+    # clients never send resources/subscribe
+    capabilities = type(mcp._mcp_server).get_capabilities(
+        mcp._mcp_server, *args, **kwargs
+    )
+    if capabilities.resources is not None:
+        capabilities.resources.subscribe = True
+    return capabilities
+
+
+mcp._mcp_server.get_capabilities = get_capabilities
+
+
 if __name__ == "__main__":
     mcp.run()
@@ -7,30 +7,23 @@ from fastmcp import FastMCP
 # Create FastMCP server
 mcp = FastMCP("code-review-server", version="1.0.0")
 
-# Read the Python style guide at startup
 style_guide_path = Path(__file__).parent / "python_style_guide.md"
-try:
-    with open(style_guide_path, "r", encoding="utf-8") as f:
-        python_style_guide = f.read()
-except FileNotFoundError:
-    python_style_guide = "Python style guide not found."
 
-
-@mcp.prompt
-def review_code(code: str) -> str:
-    """Review Python code for best practices and potential issues"""
-
-    return f"""Please review this Python code to see if it follows our best practices. Use this Python style guide as a reference:
+# Everything before the code depends only on the style guide, so it is built
+# once per version of the guide and also served as a resource for caching
+PREFIX_TEMPLATE = """Please review this Python code to see if it follows our best practices. Use this Python style guide as a reference:
 
 =============
 
-{python_style_guide}
+{style_guide}
 
 =============
 
 Code to review:
 
-{code}
+"""
+
+REVIEW_SUFFIX = """
 
 Please provide specific feedback on:
 1. Code style and PEP 8 compliance
@@ -41,6 +34,49 @@ Please provide specific feedback on:
 
 Format your response with clear sections and actionable recommendations."""
 
+# (style guide mtime, rendered prefix), rebuilt when the guide is edited
+compiled_prefix = (None, None)
+
+
+def review_prefix() -> str:
+    """The static start of the review prompt, reloading the guide if it changed"""
+    global compiled_prefix
+
+    try:
+        mtime = style_guide_path.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+
+    if compiled_prefix[1] is None or compiled_prefix[0] != mtime:
+        try:
+            with open(style_guide_path, "r", encoding="utf-8") as f:
+                python_style_guide = f.read()
+        except FileNotFoundError:
+            python_style_guide = "Python style guide not found."
+        compiled_prefix = (
+            mtime,
+            PREFIX_TEMPLATE.format(style_guide=python_style_guide),
+        )
+
+    return compiled_prefix[1]
+
+
+@mcp.prompt
+def review_code(code: str) -> str:
+    """Review Python code for best practices and potential issues"""
+
+    return review_prefix() + code + REVIEW_SUFFIX
+
+
+@mcp.resource("prompt://review_code/prefix", mime_type="text/plain")
+def review_code_prefix() -> str:
+    """Static start of the review_code prompt (instructions and style guide)
+
+    Every review_code prompt begins with exactly this text, so clients can
+    send it as a cached prompt prefix and only pay for the code that follows.
+    """
+    return review_prefix()
+
 
 if __name__ == "__main__":
     mcp.run()
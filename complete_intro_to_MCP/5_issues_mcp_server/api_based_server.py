@@ -1,20 +1,36 @@
 #!/usr/bin/env python3
 
 import json
-import os
-import sqlite3
-from pathlib import Path
 from typing import List, Optional
 
-import httpx
-from fastmcp import FastMCP
+from fastmcp import Context, FastMCP
 from pydantic import BaseModel, Field
 
-# Create the MCP server
-mcp = FastMCP("issues-tracker-api-server")
-
-# Configuration
-API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:3000/api")
+from api_client import (
+    API_BASE_URL,
+    collect_issues,
+    dumps,
+    make_batch_requests,
+    make_request,
+    parse_fields,
+    pool_metrics,
+    select_fields,
+    shape_response,
+)
+from local_db import (
+    collect_local_issues,
+    database_schema,
+    issues_lifespan,
+    list_issues,
+    watch_schema,
+)
+
+# Create the MCP server (the lifespan opens the local database and closes the
+# shared HTTP client on exit)
+mcp = FastMCP("issues-tracker-api-server", lifespan=issues_lifespan)
+
+# Most items a single batch tool call accepts
+MAX_BATCH_SIZE = 100
 
 
 # Pydantic Models
@@ -32,8 +48,7 @@ class IssueCreateData(BaseModel):
     tag_ids: Optional[List[int]] = Field(None, description="Array of integer tag IDs")
 
 
-class IssueUpdateData(BaseModel):
-    api_key: str = Field(description="API key for authentication")
+class IssueBulkUpdateItem(BaseModel):
     id: int = Field(description="Issue ID")
     title: Optional[str] = Field(None, description="Issue title")
     description: Optional[str] = Field(None, description="Issue description")
@@ -47,37 +62,37 @@ class IssueUpdateData(BaseModel):
     tag_ids: Optional[List[int]] = Field(None, description="Array of integer tag IDs")
 
 
-async def make_request(
-    method: str, url: str, data: dict = None, headers: dict = None
-) -> dict:
-    """Helper function to make HTTP requests"""
-    default_headers = {"Content-Type": "application/json"}
-    if headers:
-        default_headers.update(headers)
-
-    async with httpx.AsyncClient() as client:
-        try:
-            if method.upper() == "GET":
-                response = await client.get(url, headers=default_headers)
-            elif method.upper() == "POST":
-                response = await client.post(url, json=data, headers=default_headers)
-            elif method.upper() == "PUT":
-                response = await client.put(url, json=data, headers=default_headers)
-            elif method.upper() == "DELETE":
-                response = await client.delete(url, headers=default_headers)
-
-            try:
-                json_result = response.json()
-            except:
-                json_result = response.text
-
-            return {
-                "status": response.status_code,
-                "data": json_result,
-                "headers": dict(response.headers),
-            }
-        except Exception as error:
-            return {"status": 0, "error": str(error)}
+class IssueUpdateData(IssueBulkUpdateItem):
+    api_key: str = Field(description="API key for authentication")
+
+
+class IssueBulkUpdateData(BaseModel):
+    api_key: str = Field(description="API key for authentication")
+    updates: List[IssueBulkUpdateItem] = Field(
+        description=f"Issue updates to apply (max {MAX_BATCH_SIZE})"
+    )
+
+
+def batch_response(
+    ids: List[int], results: List[dict], fields: Optional[str] = None
+) -> str:
+    """Combine per-issue results of a batch tool into one response"""
+    selected = parse_fields(fields)
+    items = []
+    for issue_id, result in zip(ids, results):
+        item = {"id": issue_id, "status": result["status"]}
+        if "error" in result:
+            item["error"] = result["error"]
+        elif selected:
+            item["data"] = select_fields(result["data"], selected)
+        else:
+            item["data"] = result["data"]
+        items.append(item)
+
+    succeeded = sum(1 for item in items if 200 <= item["status"] < 300)
+    return dumps(
+        {"succeeded": succeeded, "failed": len(items) - succeeded, "results": items}
+    )
 
 
 # Issues Tools
@@ -94,6 +109,10 @@ async def issues_list(
     limit: Optional[int] = None,
     priority: Optional[str] = None,
     created_by_user_id: Optional[str] = None,
+    all_pages: bool = False,
+    max_items: Optional[int] = None,
+    fields: Optional[str] = None,
+    ctx: Context = None,
 ) -> str:
     """Get a list of issues with optional filtering
 
@@ -107,6 +126,9 @@ async def issues_list(
         limit: Items per page (default: 10, max: 100)
         priority: Filter by priority (low, medium, high)
         created_by_user_id: Filter by creator user ID
+        all_pages: Fetch every page instead of one (ignores page and limit)
+        max_items: Most issues to return when all_pages is set
+        fields: Comma-separated issue fields to keep (e.g. "id,title,status")
     """
     params = {}
 
@@ -123,13 +145,34 @@ async def issues_list(
         if value is not None:
             params[key] = value
 
+    if all_pages:
+        params.pop("page", None)
+        params.pop("limit", None)
+        result = await collect_local_issues(
+            api_key, params, max_items, parse_fields(fields)
+        )
+        if result is None:
+            result = await collect_issues(
+                params,
+                {"x-api-key": api_key},
+                max_items=max_items,
+                fields=parse_fields(fields),
+                ctx=ctx,
+            )
+        return shape_response(result)
+
+    # Served from the backend's database file when it is available locally
+    result = await list_issues(api_key, params, page, limit)
+    if result is not None:
+        return shape_response(result, fields)
+
     query_string = "&".join([f"{k}={v}" for k, v in params.items()])
     url = f"{API_BASE_URL}/issues"
     if query_string:
         url += f"?{query_string}"
 
     result = await make_request("GET", url, headers={"x-api-key": api_key})
-    return json.dumps(result, indent=2)
+    return shape_response(result, fields)
 
 
 @mcp.tool()
@@ -151,21 +194,22 @@ async def issues_create(data: IssueCreateData) -> str:
         data=issue_data,
         headers={"x-api-key": api_key},
     )
-    return json.dumps(result, indent=2)
+    return shape_response(result)
 
 
 @mcp.tool()
-async def issues_get(api_key: str, id: int) -> str:
+async def issues_get(api_key: str, id: int, fields: Optional[str] = None) -> str:
     """Get a specific issue by its ID
 
     Args:
         api_key: API key for authentication
         id: Issue ID
+        fields: Comma-separated issue fields to keep (default: all)
     """
     result = await make_request(
         "GET", f"{API_BASE_URL}/issues/{id}", headers={"x-api-key": api_key}
     )
-    return json.dumps(result, indent=2)
+    return shape_response(result, fields)
 
 
 @mcp.tool()
@@ -188,7 +232,60 @@ async def issues_update(data: IssueUpdateData) -> str:
         data=update_data,
         headers={"x-api-key": api_key},
     )
-    return json.dumps(result, indent=2)
+    return shape_response(result)
+
+
+@mcp.tool()
+async def issues_get_many(
+    api_key: str, ids: List[int], fields: Optional[str] = None
+) -> str:
+    """Get several issues by ID in one call
+
+    Args:
+        api_key: API key for authentication
+        ids: Issue IDs to fetch (max 100)
+        fields: Comma-separated issue fields to keep (default: all)
+    """
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > MAX_BATCH_SIZE:
+        return dumps(
+            {"error": f"Too many IDs ({len(ids)}), the maximum is {MAX_BATCH_SIZE}"}
+        )
+
+    results = await make_batch_requests(
+        [("GET", f"{API_BASE_URL}/issues/{issue_id}", None) for issue_id in ids],
+        headers={"x-api-key": api_key},
+    )
+    return batch_response(ids, results, fields)
+
+
+@mcp.tool()
+async def issues_bulk_update(data: IssueBulkUpdateData) -> str:
+    """Update several existing issues in one call
+
+    Args:
+        data: API key and the list of updates, each with an issue ID and the fields to change
+    """
+    if len(data.updates) > MAX_BATCH_SIZE:
+        return dumps(
+            {
+                "error": f"Too many updates ({len(data.updates)}), "
+                f"the maximum is {MAX_BATCH_SIZE}"
+            }
+        )
+
+    results = await make_batch_requests(
+        [
+            (
+                "PUT",
+                f"{API_BASE_URL}/issues/{update.id}",
+                update.model_dump(exclude={"id"}, exclude_none=True),
+            )
+            for update in data.updates
+        ],
+        headers={"x-api-key": data.api_key},
+    )
+    return batch_response([update.id for update in data.updates], results)
 
 
 @mcp.tool()
@@ -202,23 +299,24 @@ async def issues_delete(api_key: str, id: int) -> str:
     result = await make_request(
         "DELETE", f"{API_BASE_URL}/issues/{id}", headers={"x-api-key": api_key}
     )
-    return json.dumps(result, indent=2)
+    return shape_response(result)
 
 
 # Tags Tools
 
 
 @mcp.tool()
-async def tags_list(api_key: str) -> str:
+async def tags_list(api_key: str, fields: Optional[str] = None) -> str:
     """Get all available tags
 
     Args:
         api_key: API key for authentication
+        fields: Comma-separated tag fields to keep (default: all)
     """
     result = await make_request(
         "GET", f"{API_BASE_URL}/tags", headers={"x-api-key": api_key}
     )
-    return json.dumps(result, indent=2)
+    return shape_response(result, fields)
 
 
 @mcp.tool()
@@ -235,7 +333,7 @@ async def tags_create(api_key: str, name: str, color: str) -> str:
     result = await make_request(
         "POST", f"{API_BASE_URL}/tags", data=tag_data, headers={"x-api-key": api_key}
     )
-    return json.dumps(result, indent=2)
+    return shape_response(result)
 
 
 @mcp.tool()
@@ -249,23 +347,24 @@ async def tags_delete(api_key: str, id: int) -> str:
     result = await make_request(
         "DELETE", f"{API_BASE_URL}/tags/{id}", headers={"x-api-key": api_key}
     )
-    return json.dumps(result, indent=2)
+    return shape_response(result)
 
 
 # Users Tools
 
 
 @mcp.tool()
-async def users_list(api_key: str) -> str:
+async def users_list(api_key: str, fields: Optional[str] = None) -> str:
     """Get all users
 
     Args:
         api_key: API key for authentication
+        fields: Comma-separated user fields to keep (default: all)
     """
     result = await make_request(
         "GET", f"{API_BASE_URL}/users", headers={"x-api-key": api_key}
     )
-    return json.dumps(result, indent=2)
+    return shape_response(result, fields)
 
 
 # API Key Tools
@@ -281,7 +380,7 @@ async def api_key_verify(api_key: str) -> str:
     result = await make_request(
         "POST", f"{API_BASE_URL}/auth/api-key/verify", data={"key": api_key}
     )
-    return json.dumps(result, indent=2)
+    return shape_response(result)
 
 
 # Health Check Tools
@@ -292,7 +391,7 @@ async def health_status() -> str:
     """Get the health status of the API"""
     health_url = API_BASE_URL.replace("/api", "") + "/health"
     result = await make_request("GET", health_url)
-    return json.dumps(result, indent=2)
+    return shape_response(result)
 
 
 @mcp.tool()
@@ -300,7 +399,7 @@ async def health_ready() -> str:
     """Check if the API is ready to serve requests"""
     ready_url = API_BASE_URL.replace("/api", "") + "/health/ready"
     result = await make_request("GET", ready_url)
-    return json.dumps(result, indent=2)
+    return shape_response(result)
 
 
 @mcp.tool()
@@ -308,7 +407,7 @@ async def health_live() -> str:
     """Check if the API is alive"""
     live_url = API_BASE_URL.replace("/api", "") + "/health/live"
     result = await make_request("GET", live_url)
-    return json.dumps(result, indent=2)
+    return shape_response(result)
 
 
 # Database Schema Resource
@@ -317,31 +416,25 @@ async def health_live() -> str:
 @mcp.resource("schema://database")
 async def get_database_schema() -> str:
     """SQLite schema for the issues database"""
-    # Get the database path relative to the mcp-issue-tracker folder
-    current_dir = Path(__file__).parent
-    project_root = current_dir.parent
-    db_path = project_root / "mcp-issue-tracker" / "backend" / "database.sqlite"
-
-    if not db_path.exists():
+    try:
+        return database_schema()
+    except FileNotFoundError:
         return "Database file not found. Make sure the issue tracker backend is set up."
+    except Exception as e:
+        return f"Error reading database schema: {str(e)}"
 
-    try:
-        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
-        cursor = conn.cursor()
 
-        cursor.execute(
-            "SELECT sql FROM sqlite_master WHERE type='table' AND sql IS NOT NULL ORDER BY name"
-        )
+# Subscribed clients get resources/updated when the schema changes
+watch_schema(mcp)
 
-        schemas = []
-        for row in cursor.fetchall():
-            schemas.append(row[0] + ";")
 
-        conn.close()
-        return "\n".join(schemas)
+# HTTP Client Metrics Resource
 
-    except Exception as e:
-        return f"Error reading database schema: {str(e)}"
+
+@mcp.resource("metrics://http")
+async def get_http_metrics() -> str:
+    """Request counters and connection pool state of the backend HTTP client"""
+    return json.dumps(pool_metrics(), indent=2)
 
 
 if __name__ == "__main__":
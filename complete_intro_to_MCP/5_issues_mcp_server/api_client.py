@@ -0,0 +1,634 @@
+"""
+Shared HTTP client for the issues tracker MCP servers.
+
+Both job_based_server.py and api_based_server.py talk to the same backend,
+so they share this module: one pooled httpx.AsyncClient per server process
+that keeps connections to API_BASE_URL alive between tool calls.
+
+Configuration (environment variables):
+- API_BASE_URL: Base URL of the issue tracker API
+- ISSUES_HTTP2: Set to 1 to use HTTP/2 (needs `pip install httpx[http2]`)
+- ISSUES_MAX_CONNECTIONS: Maximum open connections (default: 20)
+- ISSUES_MAX_KEEPALIVE: Idle connections kept open for reuse (default: 10)
+- ISSUES_KEEPALIVE_EXPIRY: Seconds an idle connection is kept (default: 30)
+- ISSUES_BATCH_CONCURRENCY: Concurrent requests per batch tool call (default: 10)
+- ISSUES_CACHE_TTL: Seconds GET responses are reused without asking the backend
+  (default: 5, tags and users: ISSUES_STATIC_CACHE_TTL, default: 300)
+- ISSUES_MAX_LIST_ITEMS: Most issues one auto-paginated listing returns (default: 1000)
+- ISSUES_RESPONSE_PRETTY: Set to 1 to indent tool responses (default: compact JSON)
+- ISSUES_RESPONSE_HEADERS: Set to 1 to include HTTP response headers in tool responses
+- ISSUES_TIMEOUT: Seconds before a request to the API times out (default: 10,
+  health checks: ISSUES_HEALTH_TIMEOUT, default: 2)
+- ISSUES_MAX_RETRIES: Retries of failed GET/PUT/DELETE requests (default: 2)
+- ISSUES_BREAKER_THRESHOLD: Consecutive failures that open the circuit breaker (default: 5)
+- ISSUES_BREAKER_COOLDOWN: Seconds the breaker fails fast before probing
+  /health/ready again (default: 30)
+
+Tool responses are serialized with orjson when it is installed.
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import OrderedDict
+from contextlib import aclosing, asynccontextmanager
+from typing import AsyncIterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Configuration
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:3000/api")
+HTTP2 = os.getenv("ISSUES_HTTP2", "0") == "1"
+MAX_CONNECTIONS = int(os.getenv("ISSUES_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE = int(os.getenv("ISSUES_MAX_KEEPALIVE", "10"))
+KEEPALIVE_EXPIRY = float(os.getenv("ISSUES_KEEPALIVE_EXPIRY", "30"))
+BATCH_CONCURRENCY = int(os.getenv("ISSUES_BATCH_CONCURRENCY", "10"))
+CACHE_TTL = float(os.getenv("ISSUES_CACHE_TTL", "5"))
+STATIC_CACHE_TTL = float(os.getenv("ISSUES_STATIC_CACHE_TTL", "300"))
+CACHE_SIZE = 1024
+MAX_LIST_ITEMS = int(os.getenv("ISSUES_MAX_LIST_ITEMS", "1000"))
+# Largest page the backend serves
+MAX_PAGE_SIZE = 100
+PRETTY_RESPONSES = os.getenv("ISSUES_RESPONSE_PRETTY", "0") == "1"
+RESPONSE_HEADERS = os.getenv("ISSUES_RESPONSE_HEADERS", "0") == "1"
+# Keys under which list responses hold their items
+LIST_KEYS = ("issues", "data", "items")
+TIMEOUT = float(os.getenv("ISSUES_TIMEOUT", "10"))
+HEALTH_TIMEOUT = float(os.getenv("ISSUES_HEALTH_TIMEOUT", "2"))
+MAX_RETRIES = int(os.getenv("ISSUES_MAX_RETRIES", "2"))
+BREAKER_THRESHOLD = int(os.getenv("ISSUES_BREAKER_THRESHOLD", "5"))
+BREAKER_COOLDOWN = float(os.getenv("ISSUES_BREAKER_COOLDOWN", "30"))
+# Backoff before retry n is a random delay up to min(cap, base * 2**n) seconds
+RETRY_BACKOFF_BASE = 0.2
+RETRY_BACKOFF_CAP = 2.0
+
+HEALTH_URL = API_BASE_URL.replace("/api", "") + "/health"
+READY_URL = HEALTH_URL + "/ready"
+# URL path prefix -> request timeout, everything else uses TIMEOUT
+ENDPOINT_TIMEOUTS = {
+    urlsplit(HEALTH_URL).path: HEALTH_TIMEOUT,
+    urlsplit(API_BASE_URL).path + "/auth": 5.0,
+}
+# Methods that are safe to send again after a failure
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Collections whose GET responses are cached, and how long they stay fresh
+CACHE_TTLS = {
+    "/issues": CACHE_TTL,
+    "/tags": STATIC_CACHE_TTL,
+    "/users": STATIC_CACHE_TTL,
+}
+# Cached collections that embed data from another collection
+CACHE_DEPENDENTS = {
+    "/tags": ["/issues"],
+    "/users": ["/issues"],
+}
+
+_client = None
+# Number of running server lifespans using the client
+_lifespan_users = 0
+# (api key, url) -> cached GET result with its validators and expiry time
+_cache = OrderedDict()
+# collection -> number of times it was invalidated, so a GET that was in
+# flight during a write doesn't store the response it got from before it
+_cache_generations = {}
+# Consecutive failed requests, and until when the open breaker fails fast
+_breaker = {"failures": 0, "open_until": 0.0}
+
+# Counters reported by pool_metrics()
+metrics = {
+    "requests": 0,
+    "errors": 0,
+    "in_flight": 0,
+    "peak_in_flight": 0,
+    "connections_opened": 0,
+    "ok": 0,
+    "client_errors": 0,
+    "server_errors": 0,
+    "timeouts": 0,
+    "retries": 0,
+    "breaker_opened": 0,
+    "breaker_rejected": 0,
+    "cache_hits": 0,
+    "cache_revalidated": 0,
+    "cache_misses": 0,
+    "responses": 0,
+    "response_bytes": 0,
+    "header_bytes_stripped": 0,
+}
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use"""
+    global _client
+
+    if _client is None or _client.is_closed:
+        http2 = HTTP2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print(
+                    "ISSUES_HTTP2=1 needs the h2 package (pip install httpx[http2]), "
+                    "falling back to HTTP/1.1",
+                    file=sys.stderr,
+                )
+                http2 = False
+
+        _client = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client and its pooled connections"""
+    global _client
+
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@asynccontextmanager
+async def client_lifespan(server):
+    """FastMCP lifespan that closes the shared client when the server shuts down"""
+    global _lifespan_users
+
+    _lifespan_users += 1
+    try:
+        yield
+    finally:
+        # HTTP transports run a lifespan per session, so only the last one closes
+        _lifespan_users -= 1
+        if _lifespan_users == 0:
+            await close_client()
+
+
+async def _trace(event_name: str, info: dict) -> None:
+    # httpcore reports every new TCP connection, pooled reuse reports nothing
+    if event_name == "connection.connect_tcp.complete":
+        metrics["connections_opened"] += 1
+
+
+def pool_metrics() -> dict:
+    """Request counters plus the current state of the connection pool"""
+    stats = dict(metrics)
+    stats["http2"] = HTTP2
+    stats["breaker"] = "open" if _breaker["open_until"] > time.monotonic() else "closed"
+    stats["json_encoder"] = "orjson" if orjson is not None else "json"
+    # Roughly 4 bytes of JSON per LLM token
+    stats["response_tokens_estimate"] = metrics["response_bytes"] // 4
+    stats["avg_response_bytes"] = (
+        metrics["response_bytes"] // metrics["responses"]
+        if metrics["responses"]
+        else None
+    )
+    stats["connection_reuse_ratio"] = (
+        round(1 - metrics["connections_opened"] / metrics["requests"], 3)
+        if metrics["requests"]
+        else None
+    )
+
+    # httpx doesn't expose its pool publicly, so look inside it carefully
+    pool = getattr(getattr(_client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is not None:
+        stats["open_connections"] = len(connections)
+        stats["idle_connections"] = sum(1 for conn in connections if conn.is_idle())
+
+    return stats
+
+
+def _collection(url: str) -> Optional[str]:
+    """The cached collection ("/issues", "/tags", ...) a URL belongs to, if any"""
+    if not url.startswith(API_BASE_URL + "/"):
+        return None
+    path = url[len(API_BASE_URL) :]
+    for collection in CACHE_TTLS:
+        if path == collection or path.startswith((collection + "/", collection + "?")):
+            return collection
+    return None
+
+
+def invalidate_cache(collection: str, dependents: bool = True) -> None:
+    """Drop cached responses of a collection and of collections embedding it
+
+    With dependents=False only the collection's own responses are dropped,
+    for refreshing it without a write having happened.
+    """
+    names = [collection]
+    if dependents:
+        names += CACHE_DEPENDENTS.get(collection, [])
+    for name in names:
+        _cache_generations[name] = _cache_generations.get(name, 0) + 1
+    prefixes = [API_BASE_URL + name for name in names]
+    for key in list(_cache):
+        if _collection(key[1]) and key[1].startswith(tuple(prefixes)):
+            del _cache[key]
+
+
+async def make_request(
+    method: str, url: str, data: dict = None, headers: dict = None
+) -> dict:
+    """Helper function to make HTTP requests
+
+    GET responses from the issues, tags and users endpoints are cached per API
+    key and URL. Fresh entries are returned without a request, stale ones are
+    revalidated with If-None-Match / If-Modified-Since, and any POST, PUT or
+    DELETE on a collection drops its cached responses, including those of GETs
+    still in flight.
+    """
+    method = method.upper()
+    default_headers = {"Content-Type": "application/json"}
+    if headers:
+        default_headers.update(headers)
+
+    collection = _collection(url)
+    cache_key = (default_headers.get("x-api-key"), url)
+    cached = _cache.get(cache_key) if method == "GET" and collection else None
+
+    if cached is not None:
+        if cached["expires_at"] > time.monotonic():
+            metrics["cache_hits"] += 1
+            _cache.move_to_end(cache_key)
+            return dict(cached["result"])
+        if cached["etag"]:
+            default_headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            default_headers["If-Modified-Since"] = cached["last_modified"]
+
+    if not url.startswith(HEALTH_URL) and not await _breaker_allows():
+        metrics["breaker_rejected"] += 1
+        wait = max(_breaker["open_until"] - time.monotonic(), 0)
+        return {
+            "status": 0,
+            "error": f"Backend unavailable (circuit open), retry in {wait:.0f}s",
+        }
+
+    generation = _cache_generations.get(collection)
+    try:
+        response = await _send(method, url, data, default_headers)
+    except Exception as error:
+        metrics["errors"] += 1
+        return {"status": 0, "error": str(error) or type(error).__name__}
+
+    # Invalidated while the request was in flight, so don't cache its answer
+    invalidated = _cache_generations.get(collection) != generation
+
+    if method != "GET":
+        if collection:
+            invalidate_cache(collection)
+    elif cached is not None and response.status_code == 304:
+        # Still valid: keep serving the cached copy for another TTL
+        metrics["cache_revalidated"] += 1
+        if not invalidated:
+            cached["expires_at"] = time.monotonic() + CACHE_TTLS[collection]
+            _cache.move_to_end(cache_key)
+        return dict(cached["result"])
+
+    try:
+        json_result = response.json()
+    except ValueError:
+        json_result = response.text
+
+    result = {
+        "status": response.status_code,
+        "data": json_result,
+        "headers": dict(response.headers),
+    }
+
+    if method == "GET" and collection:
+        metrics["cache_misses"] += 1
+        cacheable = (
+            response.status_code == 200
+            and not invalidated
+            and "no-store" not in response.headers.get("cache-control", "")
+        )
+        if cacheable:
+            _cache[cache_key] = {
+                "result": result,
+                "etag": response.headers.get("etag"),
+                "last_modified": response.headers.get("last-modified"),
+                "expires_at": time.monotonic() + CACHE_TTLS[collection],
+            }
+            _cache.move_to_end(cache_key)
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+        else:
+            _cache.pop(cache_key, None)
+
+    return dict(result)
+
+
+def _timeout(url: str) -> httpx.Timeout:
+    path = urlsplit(url).path
+    for prefix, seconds in ENDPOINT_TIMEOUTS.items():
+        if path.startswith(prefix):
+            return httpx.Timeout(seconds)
+    return httpx.Timeout(TIMEOUT)
+
+
+def _retry_delay(attempt: int, response: Optional[httpx.Response]) -> float:
+    """Full-jitter exponential backoff, or the server's short Retry-After"""
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), RETRY_BACKOFF_CAP)
+    return random.uniform(0, min(RETRY_BACKOFF_CAP, RETRY_BACKOFF_BASE * 2**attempt))
+
+
+def _record_outcome(failed: bool) -> None:
+    """Count a request towards the circuit breaker"""
+    if not failed:
+        _breaker["failures"] = 0
+        _breaker["open_until"] = 0.0
+        return
+
+    _breaker["failures"] += 1
+    if _breaker["failures"] >= BREAKER_THRESHOLD and not _breaker["open_until"]:
+        metrics["breaker_opened"] += 1
+        _breaker["open_until"] = time.monotonic() + BREAKER_COOLDOWN
+        print(
+            f"Issues API failing, failing fast for {BREAKER_COOLDOWN:.0f}s",
+            file=sys.stderr,
+        )
+
+
+async def _breaker_allows() -> bool:
+    """Whether a request may go out, probing /health/ready once the breaker cools down"""
+    if not _breaker["open_until"]:
+        return True
+    if _breaker["open_until"] > time.monotonic():
+        return False
+
+    # Half open: hold everyone else off while one probe checks readiness
+    _breaker["open_until"] = time.monotonic() + BREAKER_COOLDOWN
+    try:
+        response = await get_client().get(READY_URL, timeout=HEALTH_TIMEOUT)
+        ready = response.status_code == 200
+    except httpx.HTTPError:
+        ready = False
+
+    if ready:
+        _record_outcome(failed=False)
+    return ready
+
+
+async def _send(
+    method: str, url: str, data: Optional[dict], headers: dict
+) -> httpx.Response:
+    """Send a request with a timeout, retrying idempotent methods on failure"""
+    client = get_client()
+    retries = MAX_RETRIES if method in IDEMPOTENT_METHODS else 0
+
+    for attempt in range(retries + 1):
+        metrics["requests"] += 1
+        metrics["in_flight"] += 1
+        metrics["peak_in_flight"] = max(metrics["peak_in_flight"], metrics["in_flight"])
+        response = None
+        try:
+            response = await client.request(
+                method,
+                url,
+                json=data if method in ("POST", "PUT") else None,
+                headers=headers,
+                timeout=_timeout(url),
+                extensions={"trace": _trace},
+            )
+        except httpx.TransportError as error:
+            if isinstance(error, httpx.TimeoutException):
+                metrics["timeouts"] += 1
+            if url != READY_URL:
+                _record_outcome(failed=True)
+            if attempt == retries or _breaker["open_until"]:
+                raise
+        finally:
+            metrics["in_flight"] -= 1
+
+        if response is not None:
+            status = response.status_code
+            if status >= 500:
+                metrics["server_errors"] += 1
+            elif status >= 400:
+                metrics["client_errors"] += 1
+            else:
+                metrics["ok"] += 1
+
+            # A successful health_ready closes the breaker early
+            if url != READY_URL or status == 200:
+                _record_outcome(failed=status >= 500)
+            if (
+                status not in RETRY_STATUSES
+                or attempt == retries
+                or _breaker["open_until"]
+            ):
+                return response
+
+        metrics["retries"] += 1
+        await asyncio.sleep(_retry_delay(attempt, response))
+
+
+async def make_batch_requests(
+    requests: List[Tuple[str, str, Optional[dict]]],
+    headers: dict = None,
+    concurrency: int = BATCH_CONCURRENCY,
+) -> List[dict]:
+    """Run (method, url, data) requests concurrently, a bounded number at a time
+
+    Results are returned in the same order as the requests.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(method: str, url: str, data: Optional[dict]) -> dict:
+        async with semaphore:
+            return await make_request(method, url, data=data, headers=headers)
+
+    return await asyncio.gather(*(run(*request) for request in requests))
+
+
+def _page_items(data) -> list:
+    """The issues on one page of a list response"""
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        for key in LIST_KEYS:
+            if isinstance(data.get(key), list):
+                return data[key]
+    return []
+
+
+def _page_total(data) -> Optional[int]:
+    """Total number of matching issues, if the backend reports it"""
+    if not isinstance(data, dict):
+        return None
+    for source in (data, data.get("pagination")):
+        if isinstance(source, dict) and isinstance(source.get("total"), int):
+            return source["total"]
+    return None
+
+
+async def iter_issue_pages(
+    params: dict, headers: dict, page_size: int = MAX_PAGE_SIZE
+) -> AsyncIterator[Tuple[dict, list]]:
+    """Yield (result, issues) for each page of GET /issues
+
+    The next page is requested before the current one is yielded, so it
+    downloads while the caller processes the current page. A failed request
+    is yielded with no issues and ends the iteration.
+    """
+
+    def fetch(page: int) -> asyncio.Future:
+        query = {**params, "page": page, "limit": page_size}
+        query_string = "&".join(f"{k}={v}" for k, v in query.items())
+        return asyncio.ensure_future(
+            make_request(
+                "GET", f"{API_BASE_URL}/issues?{query_string}", headers=headers
+            )
+        )
+
+    page = 1
+    pending = fetch(page)
+    try:
+        while pending is not None:
+            result = await pending
+            pending = None
+            if result["status"] != 200:
+                yield result, []
+                return
+
+            items = _page_items(result["data"])
+            total = _page_total(result["data"])
+            more = len(items) == page_size and (
+                total is None or page * page_size < total
+            )
+            if more:
+                page += 1
+                pending = fetch(page)
+            yield result, items
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+async def collect_issues(
+    params: dict,
+    headers: dict,
+    max_items: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+    ctx=None,
+) -> dict:
+    """Fetch every page of GET /issues into a single result
+
+    Args:
+        params: Query filters passed to every page request
+        headers: Request headers (the API key)
+        max_items: Stop after this many issues (capped at MAX_LIST_ITEMS)
+        fields: Only keep these fields of each issue
+        ctx: FastMCP Context; a progress notification is sent after each page
+    """
+    max_items = min(max_items or MAX_LIST_ITEMS, MAX_LIST_ITEMS)
+    issues = []
+    total = None
+    pages = 0
+
+    pages_iter = iter_issue_pages(params, headers, min(max_items, MAX_PAGE_SIZE))
+    async with aclosing(pages_iter):
+        async for result, items in pages_iter:
+            if result["status"] != 200:
+                return result
+
+            pages += 1
+            total = _page_total(result["data"]) or total
+            if fields:
+                items = select_fields(items, fields)
+            issues.extend(items[: max_items - len(issues)])
+
+            if ctx is not None:
+                await ctx.report_progress(
+                    progress=len(issues),
+                    total=min(total, max_items) if total is not None else None,
+                    message=f"Fetched page {pages} ({len(items)} issues)",
+                )
+            if len(issues) >= max_items:
+                break
+
+    return {
+        "status": 200,
+        "data": {
+            "issues": issues,
+            "count": len(issues),
+            "total": total,
+            "pages": pages,
+            "truncated": total is not None and len(issues) < total,
+        },
+    }
+
+
+def dumps(value) -> str:
+    """Serialize a tool response as compact JSON (indented with ISSUES_RESPONSE_PRETTY=1)"""
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if PRETTY_RESPONSES else 0
+        text = orjson.dumps(value, option=option).decode()
+    elif PRETTY_RESPONSES:
+        text = json.dumps(value, indent=2)
+    else:
+        text = json.dumps(value, separators=(",", ":"))
+
+    metrics["responses"] += 1
+    metrics["response_bytes"] += len(text.encode())
+    return text
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated fields argument of a tool"""
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()] or None
+
+
+def select_fields(data, fields: List[str]):
+    """Keep only the given fields of an item, a list of items or a list response"""
+    if isinstance(data, list):
+        return [select_fields(item, fields) for item in data]
+    if not isinstance(data, dict):
+        return data
+    for key in LIST_KEYS:
+        if isinstance(data.get(key), list):
+            return {**data, key: select_fields(data[key], fields)}
+    return {field: data[field] for field in fields if field in data}
+
+
+def shape_response(result: dict, fields: Optional[str] = None) -> str:
+    """Serialize a make_request result as a tool response
+
+    HTTP headers are dropped unless ISSUES_RESPONSE_HEADERS=1, and fields
+    (comma-separated) limits the data to those fields of each item.
+    """
+    result = dict(result)
+    if not RESPONSE_HEADERS:
+        headers = result.pop("headers", None) or {}
+        metrics["header_bytes_stripped"] += sum(
+            len(name) + len(value) + 6 for name, value in headers.items()
+        )
+
+    selected = parse_fields(fields)
+    if selected and "data" in result:
+        result["data"] = select_fields(result["data"], selected)
+
+    return dumps(result)
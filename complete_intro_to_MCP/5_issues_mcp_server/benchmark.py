@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+
+"""
+Load test for the issues tracker MCP servers.
+
+Starts an in-memory stand-in for the issue tracker HTTP API, then drives
+api_based_server.py and/or job_based_server.py with concurrent MCP clients
+and reports throughput, tool call latency percentiles and how many backend
+requests each tool call cost. Use it to measure pooling and caching changes:
+
+    python benchmark.py                          # both servers, stdio and http
+    python benchmark.py --server job --transport http --clients 50
+    python benchmark.py --env ISSUES_CACHE_TTL=0 # compare with caching off
+
+Over stdio every client gets its own server process (that's how stdio
+servers are used); over HTTP all clients share one server process.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from contextlib import AsyncExitStack
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+from fastmcp import Client
+from fastmcp.client.transports import StdioTransport
+
+HERE = Path(__file__).parent
+API_KEY = "benchmark-key"
+
+SERVERS = {"api": "api_based_server", "job": "job_based_server"}
+
+# Tool calls each client cycles through: (tool name, arguments for call i)
+WORKLOADS = {
+    "api": [
+        ("issues_list", lambda i: {"api_key": API_KEY, "page": i % 5 + 1, "limit": 20}),
+        ("issues_get", lambda i: {"api_key": API_KEY, "id": i % 200 + 1}),
+        ("tags_list", lambda i: {"api_key": API_KEY}),
+        ("users_list", lambda i: {"api_key": API_KEY}),
+        (
+            "issues_update",
+            lambda i: {
+                "data": {"api_key": API_KEY, "id": i % 200 + 1, "status": "in_progress"}
+            },
+        ),
+    ],
+    "job": [
+        ("get_issue_details", lambda i: {"api_key": API_KEY, "id": i % 200 + 1}),
+        (
+            "create_bug",
+            lambda i: {
+                "api_key": API_KEY,
+                "title": f"Bug {i}",
+                "description": "Load test",
+            },
+        ),
+        (
+            "update_ticket_status",
+            lambda i: {"api_key": API_KEY, "id": i % 200 + 1, "status": "done"},
+        ),
+        ("list_my_issues", lambda i: {"api_key": API_KEY}),
+    ],
+}
+
+
+# Mock Backend
+
+
+class MockBackend:
+    """In-memory issue tracker API that counts the requests it serves"""
+
+    def __init__(self, issues: int = 250, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        self.lock = threading.Lock()
+        # Bumped on every write, used as the ETag of GET responses
+        self.version = 0
+        self.tags = [
+            {"id": 1, "name": "bug", "color": "#ef4444"},
+            {"id": 2, "name": "feature", "color": "#3b82f6"},
+        ]
+        self.users = [
+            {"id": f"user-{n}", "name": f"User {n}", "email": f"user{n}@example.com"}
+            for n in range(1, 6)
+        ]
+        self.issues = {
+            n: {
+                "id": n,
+                "title": f"Issue {n}",
+                "description": f"Description of issue {n}",
+                "status": ("not_started", "in_progress", "done")[n % 3],
+                "priority": ("low", "medium", "high", "urgent")[n % 4],
+                "assigned_user_id": self.users[n % 5]["id"],
+                "tags": [self.tags[n % 2]],
+            }
+            for n in range(1, issues + 1)
+        }
+
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                backend.handle(self, "GET")
+
+            def do_POST(self):
+                backend.handle(self, "POST")
+
+            def do_PUT(self):
+                backend.handle(self, "PUT")
+
+            def do_DELETE(self):
+                backend.handle(self, "DELETE")
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self) -> None:
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def handle(self, request: BaseHTTPRequestHandler, method: str) -> None:
+        length = int(request.headers.get("Content-Length") or 0)
+        body = json.loads(request.rfile.read(length) or b"{}") if length else {}
+        with self.lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        url = urlsplit(request.path)
+        with self.lock:
+            status, data = self.route(method, url.path, parse_qs(url.query), body)
+            etag = f'"{self.version}"'
+
+        if method == "GET" and status == 200:
+            if request.headers.get("If-None-Match") == etag:
+                request.send_response(304)
+                request.send_header("ETag", etag)
+                request.send_header("Content-Length", "0")
+                request.end_headers()
+                return
+
+        payload = json.dumps(data).encode()
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(payload)))
+        if method == "GET":
+            request.send_header("ETag", etag)
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def route(self, method: str, path: str, query: dict, body: dict):
+        if path.startswith("/health"):
+            return 200, {"status": "ok"}
+        if path == "/api/auth/api-key/verify":
+            return 200, {"valid": body.get("key") == API_KEY}
+        if path == "/api/tags":
+            return 200, self.tags
+        if path == "/api/users":
+            return 200, self.users
+
+        if path == "/api/issues" and method == "GET":
+            issues = [
+                issue
+                for issue in self.issues.values()
+                if all(
+                    str(issue.get(key)) == query[key][0]
+                    for key in ("status", "priority", "assigned_user_id")
+                    if key in query
+                )
+            ]
+            page = int(query.get("page", ["1"])[0])
+            limit = min(int(query.get("limit", ["10"])[0]), 100)
+            return 200, {
+                "issues": issues[(page - 1) * limit : page * limit],
+                "pagination": {"page": page, "limit": limit, "total": len(issues)},
+            }
+
+        if path == "/api/issues" and method == "POST":
+            self.version += 1
+            issue_id = max(self.issues, default=0) + 1
+            tags = [tag for tag in self.tags if tag["id"] in body.pop("tag_ids", [])]
+            self.issues[issue_id] = {"id": issue_id, **body, "tags": tags}
+            return 201, self.issues[issue_id]
+
+        match = re.fullmatch(r"/api/issues/(\d+)", path)
+        if match:
+            issue = self.issues.get(int(match.group(1)))
+            if issue is None:
+                return 404, {"error": "Issue not found"}
+            if method == "PUT":
+                self.version += 1
+                issue.update(body)
+            elif method == "DELETE":
+                self.version += 1
+                del self.issues[issue["id"]]
+            return 200, issue
+
+        return 404, {"error": "Not found"}
+
+
+# Servers and Clients
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_args(module: str, transport: str, port: int = None) -> list:
+    """python -c arguments that run a server without the startup banner"""
+    options = "show_banner=False"
+    if transport == "http":
+        options += f", transport='http', host='127.0.0.1', port={port}"
+    return ["-c", f"import {module}; {module}.mcp.run({options})"]
+
+
+async def wait_for_port(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Server didn't start listening on port {port}")
+            await asyncio.sleep(0.1)
+
+
+def failed(result) -> bool:
+    """Whether a tool result reports an error from the backend"""
+    if result.is_error:
+        return True
+    try:
+        status = json.loads(result.content[0].text).get("status", 200)
+    except (ValueError, AttributeError, IndexError):
+        return False
+    return not 200 <= status < 400
+
+
+async def run_benchmark(
+    server: str,
+    transport: str,
+    backend: MockBackend,
+    clients: int,
+    calls: int,
+    env: dict,
+) -> dict:
+    """Run one server/transport combination and return its measurements"""
+    module = SERVERS[server]
+    workload = WORKLOADS[server]
+    process = None
+
+    async with AsyncExitStack() as stack:
+        if transport == "http":
+            port = free_port()
+            process = subprocess.Popen(
+                [sys.executable, *serve_args(module, "http", port)],
+                cwd=HERE,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            # Callbacks run last-in first-out: terminate, then reap the process
+            stack.callback(process.wait)
+            stack.callback(process.terminate)
+            await wait_for_port(port)
+            make_client = lambda: Client(f"http://127.0.0.1:{port}/mcp")  # noqa: E731
+        else:
+            make_client = lambda: Client(  # noqa: E731
+                StdioTransport(
+                    sys.executable, serve_args(module, "stdio"), env=env, cwd=str(HERE)
+                )
+            )
+
+        # Connect everyone first so start-up time isn't measured
+        sessions = [
+            await stack.enter_async_context(make_client()) for _ in range(clients)
+        ]
+        await asyncio.gather(*(session.list_tools() for session in sessions))
+
+        latencies = []
+        errors = 0
+
+        async def drive(number: int, session: Client) -> None:
+            nonlocal errors
+            for call in range(calls):
+                name, arguments = workload[(number + call) % len(workload)]
+                started = time.perf_counter()
+                try:
+                    result = await session.call_tool(
+                        name, arguments(number * calls + call), raise_on_error=False
+                    )
+                    errors += failed(result)
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        backend_before = backend.requests
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(drive(number, session) for number, session in enumerate(sessions))
+        )
+        elapsed = time.perf_counter() - started
+        backend_requests = backend.requests - backend_before
+
+    # quantiles() needs at least two samples, a single call is every percentile
+    if len(latencies) > 1:
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    else:
+        percentiles = latencies * 99
+    return {
+        "server": module,
+        "transport": transport,
+        "clients": clients,
+        "calls": len(latencies),
+        "errors": errors,
+        "calls_per_s": len(latencies) / elapsed,
+        "p50_ms": percentiles[49] * 1000,
+        "p95_ms": percentiles[94] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "backend_per_call": backend_requests / len(latencies),
+    }
+
+
+def print_report(results: list) -> None:
+    header = (
+        f"{'server':<18}{'transport':<11}{'clients':>8}{'calls':>8}{'errors':>8}"
+        f"{'calls/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'backend/call':>14}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['server']:<18}{r['transport']:<11}{r['clients']:>8}{r['calls']:>8}"
+            f"{r['errors']:>8}{r['calls_per_s']:>10.1f}{r['p50_ms']:>9.1f}"
+            f"{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['backend_per_call']:>14.2f}"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--server", choices=["api", "job", "both"], default="both")
+    parser.add_argument(
+        "--transport", choices=["stdio", "http", "both"], default="both"
+    )
+    parser.add_argument("--clients", type=int, default=10, help="Concurrent clients")
+    parser.add_argument("--calls", type=int, default=50, help="Tool calls per client")
+    parser.add_argument(
+        "--backend-latency",
+        type=float,
+        default=0.0,
+        help="Milliseconds the mock backend waits before answering",
+    )
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Extra environment variable for the servers (repeatable)",
+    )
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+    if args.clients < 1 or args.calls < 1:
+        parser.error("--clients and --calls must be at least 1")
+
+    backend = MockBackend(latency=args.backend_latency / 1000)
+    backend.start()
+
+    env = {
+        **os.environ,
+        "API_BASE_URL": f"{backend.url}/api",
+        # Measure the HTTP path, not a local database that may happen to exist
+        "ISSUES_LOCAL_READS": "0",
+        "FASTMCP_LOG_LEVEL": "WARNING",
+    }
+    env.update(item.split("=", 1) for item in args.env)
+
+    servers = ["api", "job"] if args.server == "both" else [args.server]
+    transports = ["stdio", "http"] if args.transport == "both" else [args.transport]
+
+    results = []
+    try:
+        for server in servers:
+            for transport in transports:
+                print(f"Running {SERVERS[server]} over {transport}...", file=sys.stderr)
+                results.append(
+                    await run_benchmark(
+                        server, transport, backend, args.clients, args.calls, env
+                    )
+                )
+    finally:
+        backend.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_report(results)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -15,56 +15,117 @@ The job-based approach provides:
 Compare this with api_based_server.py to see the difference in approaches.
 """
 
+import asyncio
 import json
-import os
-import sqlite3
-from pathlib import Path
-
-import httpx
-from fastmcp import FastMCP
-
-# Create the MCP server
-mcp = FastMCP("issues-tracker-server")
-
-# Configuration
-API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:3000/api")
-
-# Hardcoded tag IDs from database (matching course approach)
-BUG_TAG_ID = 3
-FEATURE_TAG_ID = 4
-
-
-async def make_request(
-    method: str, url: str, data: dict = None, headers: dict = None
-) -> dict:
-    """Helper function to make HTTP requests"""
-    default_headers = {"Content-Type": "application/json"}
-    if headers:
-        default_headers.update(headers)
-
-    async with httpx.AsyncClient() as client:
-        try:
-            if method.upper() == "GET":
-                response = await client.get(url, headers=default_headers)
-            elif method.upper() == "POST":
-                response = await client.post(url, json=data, headers=default_headers)
-            elif method.upper() == "PUT":
-                response = await client.put(url, json=data, headers=default_headers)
-            elif method.upper() == "DELETE":
-                response = await client.delete(url, headers=default_headers)
-
-            try:
-                json_result = response.json()
-            except:
-                json_result = response.text
-
-            return {
-                "status": response.status_code,
-                "data": json_result,
-                "headers": dict(response.headers),
-            }
-        except Exception as error:
-            return {"status": 0, "error": str(error)}
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastmcp import Context, FastMCP
+
+from api_client import (
+    API_BASE_URL,
+    collect_issues,
+    dumps,
+    invalidate_cache,
+    make_request,
+    pool_metrics,
+    shape_response,
+)
+from local_db import (
+    collect_local_issues,
+    database_schema,
+    issues_lifespan,
+    local_tags,
+    watch_schema,
+)
+
+# Tags applied by the job-based tools, resolved to IDs by name
+BUG_TAG = "bug"
+FEATURE_TAG = "feature"
+# Least seconds between tag reloads caused by an unknown tag name
+TAG_REFRESH_INTERVAL = 30
+
+# Tag name (lowercase) -> tag ID
+tag_ids = {}
+# When the tags were last loaded from the API
+tags_loaded_at = None
+tags_lock = asyncio.Lock()
+
+
+# Tag Resolution
+
+
+def remember_tags(tags: list) -> None:
+    """Replace the known tags with the given tag objects"""
+    tag_ids.clear()
+    for tag in tags:
+        tag_ids[tag["name"].lower()] = tag["id"]
+
+
+async def load_tags(api_key: str) -> None:
+    """Reload the tags from the API"""
+    global tags_loaded_at
+
+    # Skip the cached tags response, a missing name means it is out of date.
+    # Nothing was written, so cached issues stay valid
+    invalidate_cache("/tags", dependents=False)
+    result = await make_request(
+        "GET", f"{API_BASE_URL}/tags", headers={"x-api-key": api_key}
+    )
+    tags_loaded_at = time.monotonic()
+    if result["status"] == 200:
+        data = result["data"]
+        remember_tags(data if isinstance(data, list) else data.get("tags", []))
+
+
+async def resolve_tag(api_key: str, name: str) -> Optional[int]:
+    """Tag ID for a tag name, reloading the tags (rate limited) when it's unknown"""
+    tag_id = tag_ids.get(name)
+    if tag_id is not None:
+        return tag_id
+
+    async with tags_lock:
+        stale = (
+            tags_loaded_at is None
+            or time.monotonic() - tags_loaded_at > TAG_REFRESH_INTERVAL
+        )
+        if name not in tag_ids and stale:
+            await load_tags(api_key)
+    return tag_ids.get(name)
+
+
+async def create_tagged_issue(api_key: str, issue_data: dict, tag: str) -> str:
+    """Create an issue with the named tag, or untagged with a warning"""
+    tag_id = await resolve_tag(api_key, tag)
+    if tag_id is not None:
+        issue_data["tag_ids"] = [tag_id]
+
+    result = await make_request(
+        "POST",
+        f"{API_BASE_URL}/issues",
+        data=issue_data,
+        headers={"x-api-key": api_key},
+    )
+    if tag_id is None:
+        result["warning"] = f"No '{tag}' tag found, the issue was created untagged"
+    return shape_response(result)
+
+
+@asynccontextmanager
+async def lifespan(server):
+    """Opens the local database and HTTP client, and loads the tags if it can"""
+    async with issues_lifespan(server):
+        # Without a local database the first tagged tool call loads them
+        tags = await asyncio.to_thread(local_tags)
+        if tags:
+            remember_tags(tags)
+        yield
+
+
+# Create the MCP server (the lifespan opens the local database and closes the
+# shared HTTP client on exit)
+mcp = FastMCP("issues-tracker-server", lifespan=lifespan)
 
 
 # Job-Based Tools - Opinionated Workflows
@@ -90,16 +151,8 @@ async def create_bug(api_key: str, title: str, description: str) -> str:
         "description": description,
         "priority": "high",
         "status": "not_started",
-        "tag_ids": [BUG_TAG_ID],  # Hardcoded bug tag ID
     }
-
-    result = await make_request(
-        "POST",
-        f"{API_BASE_URL}/issues",
-        data=issue_data,
-        headers={"x-api-key": api_key},
-    )
-    return json.dumps(result, indent=2)
+    return await create_tagged_issue(api_key, issue_data, BUG_TAG)
 
 
 @mcp.tool()
@@ -122,16 +175,8 @@ async def create_feature_request(api_key: str, title: str, description: str) ->
         "description": description,
         "priority": "low",
         "status": "not_started",
-        "tag_ids": [FEATURE_TAG_ID],  # Hardcoded feature tag ID
     }
-
-    result = await make_request(
-        "POST",
-        f"{API_BASE_URL}/issues",
-        data=issue_data,
-        headers={"x-api-key": api_key},
-    )
-    return json.dumps(result, indent=2)
+    return await create_tagged_issue(api_key, issue_data, FEATURE_TAG)
 
 
 @mcp.tool()
@@ -146,9 +191,8 @@ async def update_ticket_status(api_key: str, id: int, status: str) -> str:
         status: New status for the ticket (not_started, in_progress, done)
     """
     if status not in ["not_started", "in_progress", "done"]:
-        return json.dumps(
-            {"error": "Invalid status. Must be one of: not_started, in_progress, done"},
-            indent=2,
+        return dumps(
+            {"error": "Invalid status. Must be one of: not_started, in_progress, done"}
         )
 
     result = await make_request(
@@ -157,7 +201,7 @@ async def update_ticket_status(api_key: str, id: int, status: str) -> str:
         data={"status": status},
         headers={"x-api-key": api_key},
     )
-    return json.dumps(result, indent=2)
+    return shape_response(result)
 
 
 @mcp.tool()
@@ -187,11 +231,11 @@ async def create_urgent_issue(api_key: str, title: str, description: str) -> str
         data=issue_data,
         headers={"x-api-key": api_key},
     )
-    return json.dumps(result, indent=2)
+    return shape_response(result)
 
 
 @mcp.tool()
-async def list_my_issues(api_key: str) -> str:
+async def list_my_issues(api_key: str, ctx: Context = None) -> str:
     """List all issues in the system
 
     Simplified listing tool - gets all issues without complex filtering.
@@ -200,10 +244,11 @@ async def list_my_issues(api_key: str) -> str:
     Args:
         api_key: API key for authentication
     """
-    result = await make_request(
-        "GET", f"{API_BASE_URL}/issues", headers={"x-api-key": api_key}
-    )
-    return json.dumps(result, indent=2)
+    # Follows every page, up to ISSUES_MAX_LIST_ITEMS issues
+    result = await collect_local_issues(api_key, {})
+    if result is None:
+        result = await collect_issues({}, {"x-api-key": api_key}, ctx=ctx)
+    return shape_response(result)
 
 
 @mcp.tool()
@@ -217,7 +262,7 @@ async def get_issue_details(api_key: str, id: int) -> str:
     result = await make_request(
         "GET", f"{API_BASE_URL}/issues/{id}", headers={"x-api-key": api_key}
     )
-    return json.dumps(result, indent=2)
+    return shape_response(result)
 
 
 # Database Schema Resource
@@ -226,31 +271,25 @@ async def get_issue_details(api_key: str, id: int) -> str:
 @mcp.resource("schema://database")
 async def get_database_schema() -> str:
     """SQLite schema for the issues database"""
-    # Get the database path relative to the mcp-issue-tracker folder
-    current_dir = Path(__file__).parent
-    project_root = current_dir.parent
-    db_path = project_root / "mcp-issue-tracker" / "backend" / "database.sqlite"
-
-    if not db_path.exists():
+    try:
+        return database_schema()
+    except FileNotFoundError:
         return "Database file not found. Make sure the issue tracker backend is set up."
+    except Exception as e:
+        return f"Error reading database schema: {str(e)}"
 
-    try:
-        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
-        cursor = conn.cursor()
 
-        cursor.execute(
-            "SELECT sql FROM sqlite_master WHERE type='table' AND sql IS NOT NULL ORDER BY name"
-        )
+# Subscribed clients get resources/updated when the schema changes
+watch_schema(mcp)
 
-        schemas = []
-        for row in cursor.fetchall():
-            schemas.append(row[0] + ";")
 
-        conn.close()
-        return "\n".join(schemas)
+# HTTP Client Metrics Resource
 
-    except Exception as e:
-        return f"Error reading database schema: {str(e)}"
+
+@mcp.resource("metrics://http")
+async def get_http_metrics() -> str:
+    """Request counters and connection pool state of the backend HTTP client"""
+    return json.dumps(pool_metrics(), indent=2)
 
 
 if __name__ == "__main__":
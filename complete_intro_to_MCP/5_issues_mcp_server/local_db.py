@@ -0,0 +1,515 @@
+"""
+Read-only local queries against the issue tracker's SQLite database.
+
+When the backend runs on the same machine, issue listings can optionally be
+answered straight from mcp-issue-tracker/backend/database.sqlite instead of
+paging through the HTTP API. The database is opened read-only through a small
+connection pool, and every listing falls back to HTTP when the file is
+missing, the schema doesn't have the columns a filter needs, or the API
+key can't be verified.
+
+Local listings return the table's rows (with their tags), newest first, and
+are marked with "source": "sqlite"; they are not guaranteed to match the
+API's representation, so the feature is off unless asked for.
+
+Configuration (environment variables):
+- ISSUES_LOCAL_READS: Set to 1 to read listings from the database (default: 0)
+- ISSUES_DB_PATH: Path of the backend database
+  (default: ../mcp-issue-tracker/backend/database.sqlite)
+- ISSUES_DB_POOL_SIZE: Read-only connections kept open (default: 4)
+- ISSUES_KEY_VERIFY_TTL: Seconds a verified API key is trusted (default: 60)
+- ISSUES_SCHEMA_POLL_INTERVAL: Seconds between schema change checks while a
+  client is subscribed to schema://database (default: 5)
+"""
+
+import asyncio
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from pydantic import AnyUrl
+
+from api_client import (
+    API_BASE_URL,
+    MAX_LIST_ITEMS,
+    MAX_PAGE_SIZE,
+    client_lifespan,
+    make_request,
+    select_fields,
+)
+
+# Configuration
+LOCAL_READS = os.getenv("ISSUES_LOCAL_READS", "0") == "1"
+DB_PATH = Path(
+    os.getenv(
+        "ISSUES_DB_PATH",
+        Path(__file__).parent.parent
+        / "mcp-issue-tracker"
+        / "backend"
+        / "database.sqlite",
+    )
+)
+POOL_SIZE = int(os.getenv("ISSUES_DB_POOL_SIZE", "4"))
+KEY_VERIFY_TTL = float(os.getenv("ISSUES_KEY_VERIFY_TTL", "60"))
+SCHEMA_URI = "schema://database"
+SCHEMA_POLL_INTERVAL = float(os.getenv("ISSUES_SCHEMA_POLL_INTERVAL", "5"))
+
+# issues_list filter -> issues column it needs
+FILTER_COLUMNS = {
+    "status": "status",
+    "priority": "priority",
+    "assigned_user_id": "assigned_user_id",
+    "created_by_user_id": "created_by_user_id",
+}
+# (table, column) pairs the filters look up, each should lead an index
+EXPECTED_INDEXES = [
+    ("issues", "status"),
+    ("issues", "priority"),
+    ("issues", "assigned_user_id"),
+    ("issue_tags", "tag_id"),
+    ("issue_tags", "issue_id"),
+]
+
+# Idle read-only connections, created on demand up to POOL_SIZE
+_pool = queue.LifoQueue()
+_pool_lock = threading.Lock()
+_opened = 0
+# table -> column names, filled in by open_db(); empty when local reads are off
+_columns: Dict[str, Set[str]] = {}
+# API key -> time until which it is trusted without asking the backend
+_verified_keys: Dict[str, float] = {}
+# Number of running server lifespans using the database
+_lifespan_users = 0
+# (file stamp, schema_version, rendered schema) of the last schema read
+_schema = None
+# Sessions subscribed to schema://database, and the task watching for changes
+_schema_subscribers = set()
+_schema_watcher = None
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+@contextmanager
+def connection():
+    """Borrow a connection from the pool"""
+    global _opened
+
+    try:
+        conn = _pool.get_nowait()
+    except queue.Empty:
+        with _pool_lock:
+            create = _opened < POOL_SIZE
+            if create:
+                _opened += 1
+        if create:
+            try:
+                conn = _connect()
+            except Exception:
+                with _pool_lock:
+                    _opened -= 1
+                raise
+        else:
+            conn = _pool.get()
+
+    try:
+        yield conn
+    finally:
+        _pool.put(conn)
+
+
+def _leading_index_columns(conn: sqlite3.Connection, table: str) -> Set[str]:
+    columns = set()
+    for index in conn.execute(f"PRAGMA index_list({table})").fetchall():
+        info = conn.execute(f"PRAGMA index_info({index['name']})").fetchall()
+        if info:
+            columns.add(min(info, key=lambda col: col["seqno"])["name"])
+    return columns
+
+
+def open_db() -> bool:
+    """Open the local database and check its schema and indexes
+
+    Returns whether local reads are available. Missing indexes are reported
+    on stderr; the database is opened read-only, so they aren't created here.
+    """
+    if _columns:
+        return True
+    if not LOCAL_READS or not DB_PATH.exists():
+        return False
+
+    try:
+        with connection() as conn:
+            tables = {
+                row["name"]
+                for row in conn.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table'"
+                )
+            }
+            if "issues" not in tables:
+                print(
+                    f"No issues table in {DB_PATH}, using the HTTP API", file=sys.stderr
+                )
+                return False
+
+            columns = {
+                table: {
+                    row["name"] for row in conn.execute(f"PRAGMA table_info({table})")
+                }
+                for table in tables & {"issues", "tags", "issue_tags"}
+            }
+
+            missing = [
+                (table, column)
+                for table, column in EXPECTED_INDEXES
+                if column in columns.get(table, ())
+                and column not in _leading_index_columns(conn, table)
+            ]
+    except sqlite3.Error as error:
+        print(f"Can't read {DB_PATH} ({error}), using the HTTP API", file=sys.stderr)
+        return False
+
+    for table, column in missing:
+        print(
+            f"{DB_PATH.name}: no index on {table}({column}), local issue queries "
+            f"filtering on it will scan the table. Consider: "
+            f"CREATE INDEX idx_{table}_{column} ON {table}({column});",
+            file=sys.stderr,
+        )
+
+    _columns.update(columns)
+    return True
+
+
+def close_db() -> None:
+    """Close the pooled connections"""
+    global _opened
+
+    while True:
+        try:
+            _pool.get_nowait().close()
+        except queue.Empty:
+            break
+    with _pool_lock:
+        _opened = 0
+    _columns.clear()
+
+
+@asynccontextmanager
+async def issues_lifespan(server):
+    """FastMCP lifespan for the shared HTTP client and the local database"""
+    global _lifespan_users
+
+    async with client_lifespan(server):
+        _lifespan_users += 1
+        if _lifespan_users == 1:
+            await asyncio.to_thread(open_db)
+        try:
+            yield
+        finally:
+            _lifespan_users -= 1
+            if _lifespan_users == 0:
+                close_db()
+
+
+async def _verify_api_key(api_key: str) -> bool:
+    """Check the key with the backend, the local database doesn't enforce auth"""
+    if _verified_keys.get(api_key, 0) > time.monotonic():
+        return True
+
+    result = await make_request(
+        "POST", f"{API_BASE_URL}/auth/api-key/verify", data={"key": api_key}
+    )
+    data = result.get("data")
+    valid = 200 <= result["status"] < 300 and not (
+        isinstance(data, dict) and data.get("valid") is False
+    )
+    if valid:
+        _verified_keys[api_key] = time.monotonic() + KEY_VERIFY_TTL
+    return valid
+
+
+def _build_query(params: dict) -> Optional[tuple]:
+    """WHERE clause and arguments for issues_list filters, None if unsupported"""
+    issue_columns = _columns["issues"]
+    clauses = []
+    args = []
+
+    for name, column in FILTER_COLUMNS.items():
+        if params.get(name) is None:
+            continue
+        if column not in issue_columns:
+            return None
+        clauses.append(f"i.{column} = ?")
+        args.append(params[name])
+
+    if params.get("search"):
+        searchable = [c for c in ("title", "description") if c in issue_columns]
+        if not searchable:
+            return None
+        clauses.append("(" + " OR ".join(f"i.{c} LIKE ?" for c in searchable) + ")")
+        args.extend([f"%{params['search']}%"] * len(searchable))
+
+    if params.get("tag_ids"):
+        if "tag_id" not in _columns.get("issue_tags", ()):
+            return None
+        try:
+            tag_ids = [int(t) for t in str(params["tag_ids"]).split(",") if t.strip()]
+        except ValueError:
+            return None
+        clauses.append(
+            "EXISTS (SELECT 1 FROM issue_tags it WHERE it.issue_id = i.id "
+            f"AND it.tag_id IN ({', '.join('?' * len(tag_ids))}))"
+        )
+        args.extend(tag_ids)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, args
+
+
+def _query_issues(where: str, args: list, limit: int, offset: int) -> tuple:
+    order = (
+        "i.created_at DESC, i.id DESC"
+        if "created_at" in _columns["issues"]
+        else "i.id DESC"
+    )
+
+    with connection() as conn:
+        total = conn.execute(f"SELECT COUNT(*) FROM issues i {where}", args).fetchone()[
+            0
+        ]
+        issues = [
+            dict(row)
+            for row in conn.execute(
+                f"SELECT i.* FROM issues i {where} ORDER BY {order} LIMIT ? OFFSET ?",
+                [*args, limit, offset],
+            )
+        ]
+
+        if (
+            issues
+            and "tags" in _columns
+            and "issue_id" in _columns.get("issue_tags", ())
+        ):
+            by_id = {issue["id"]: issue for issue in issues}
+            for issue in issues:
+                issue["tags"] = []
+            rows = conn.execute(
+                "SELECT it.issue_id AS issue_id, t.* FROM issue_tags it "
+                "JOIN tags t ON t.id = it.tag_id "
+                f"WHERE it.issue_id IN ({', '.join('?' * len(by_id))})",
+                list(by_id),
+            )
+            for row in rows:
+                tag = dict(row)
+                by_id[tag.pop("issue_id")]["tags"].append(tag)
+
+    return total, issues
+
+
+async def list_issues(
+    api_key: str, params: dict, page: int = 1, limit: int = 10
+) -> Optional[dict]:
+    """Answer an issues_list query from the local database
+
+    Returns a result shaped like GET /issues (issue rows with their tags),
+    or None when the query has to go through the HTTP API instead. Like the
+    API, a page holds at most MAX_PAGE_SIZE issues.
+    """
+    limit = min(max(limit or 10, 1), MAX_PAGE_SIZE)
+    return await _list_issues(api_key, params, max(page or 1, 1), limit)
+
+
+async def _list_issues(
+    api_key: str, params: dict, page: int, limit: int
+) -> Optional[dict]:
+    if not _columns:
+        return None
+    query = _build_query(params)
+    if query is None or not await _verify_api_key(api_key):
+        return None
+
+    try:
+        total, issues = await asyncio.to_thread(
+            _query_issues, *query, limit, (page - 1) * limit
+        )
+    except sqlite3.Error as error:
+        print(
+            f"Local issue query failed ({error}), using the HTTP API", file=sys.stderr
+        )
+        return None
+
+    return {
+        "status": 200,
+        "source": "sqlite",
+        "data": {
+            "issues": issues,
+            "pagination": {
+                "page": page,
+                "limit": limit,
+                "total": total,
+                "pages": -(-total // limit),
+            },
+        },
+    }
+
+
+def local_tags() -> Optional[List[dict]]:
+    """Rows of the tags table, None when local reads are unavailable"""
+    if "tags" not in _columns:
+        return None
+    try:
+        with connection() as conn:
+            return [dict(row) for row in conn.execute("SELECT * FROM tags")]
+    except sqlite3.Error:
+        return None
+
+
+async def collect_local_issues(
+    api_key: str,
+    params: dict,
+    max_items: Optional[int] = None,
+    fields: Optional[List[str]] = None,
+) -> Optional[dict]:
+    """Local counterpart of api_client.collect_issues, None to use HTTP instead"""
+    max_items = min(max_items or MAX_LIST_ITEMS, MAX_LIST_ITEMS)
+    # One query for everything, up to MAX_LIST_ITEMS rather than a page
+    result = await _list_issues(api_key, params, 1, max_items)
+    if result is None:
+        return None
+
+    issues = result["data"]["issues"]
+    total = result["data"]["pagination"]["total"]
+    if fields:
+        issues = select_fields(issues, fields)
+
+    return {
+        "status": 200,
+        "source": "sqlite",
+        "data": {
+            "issues": issues,
+            "count": len(issues),
+            "total": total,
+            "pages": 1,
+            "truncated": len(issues) < total,
+        },
+    }
+
+
+# Database Schema
+
+
+def _file_stamp() -> tuple:
+    # In WAL mode changes land in the -wal file before the database file
+    wal = DB_PATH.with_name(DB_PATH.name + "-wal")
+    return (
+        DB_PATH.stat().st_mtime_ns,
+        wal.stat().st_mtime_ns if wal.exists() else None,
+    )
+
+
+def _read_schema(cached: Optional[tuple]) -> tuple:
+    """Re-read the schema unless the file and schema_version are unchanged"""
+    stamp = _file_stamp()
+    if cached is not None and cached[0] == stamp:
+        return cached
+
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True)
+    try:
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        # Data writes change the file too, only DDL bumps schema_version
+        if cached is not None and cached[1] == version:
+            return stamp, version, cached[2]
+
+        rows = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type='table' AND sql IS NOT NULL ORDER BY name"
+        ).fetchall()
+        return stamp, version, "\n".join(row[0] + ";" for row in rows)
+    finally:
+        conn.close()
+
+
+def database_schema() -> str:
+    """SQL of every table, cached until the schema changes
+
+    Raises FileNotFoundError when the database doesn't exist.
+    """
+    global _schema
+
+    if not DB_PATH.exists():
+        raise FileNotFoundError(f"Database file not found at {DB_PATH}")
+    _schema = _read_schema(_schema)
+    return _schema[2]
+
+
+async def _watch_schema() -> None:
+    """Notify subscribers with resources/updated whenever the schema changes"""
+    global _schema, _schema_watcher
+
+    try:
+        while _schema_subscribers:
+            await asyncio.sleep(SCHEMA_POLL_INTERVAL)
+            previous = _schema
+            try:
+                _schema = await asyncio.to_thread(_read_schema, previous)
+            except (OSError, sqlite3.Error):
+                continue
+            if previous is None or _schema[2] == previous[2]:
+                continue
+
+            for session in list(_schema_subscribers):
+                try:
+                    await session.send_resource_updated(AnyUrl(SCHEMA_URI))
+                except Exception:
+                    # The client went away
+                    _schema_subscribers.discard(session)
+    finally:
+        _schema_watcher = None
+
+
+def watch_schema(mcp) -> None:
+    """Let clients subscribe to schema://database change notifications"""
+    # FastMCP has no subscription API, so register on the underlying MCP server
+    server = mcp._mcp_server
+
+    @server.subscribe_resource()
+    async def subscribe(uri: AnyUrl) -> None:
+        global _schema_watcher
+
+        if str(uri) != SCHEMA_URI:
+            return
+        _schema_subscribers.add(server.request_context.session)
+        if _schema is None:
+            try:
+                await asyncio.to_thread(database_schema)
+            except (OSError, sqlite3.Error):
+                pass
+        if _schema_watcher is None:
+            _schema_watcher = asyncio.create_task(_watch_schema())
+
+    @server.unsubscribe_resource()
+    async def unsubscribe(uri: AnyUrl) -> None:
+        if str(uri) == SCHEMA_URI:
+            _schema_subscribers.discard(server.request_context.session)
+
+    # The MCP SDK always advertises resources.subscribe=False, so without this
+    # clients never send resources/subscribe
+    get_capabilities = server.get_capabilities
+
+    def get_subscribable_capabilities(*args, **kwargs):
+        capabilities = get_capabilities(*args, **kwargs)
+        if capabilities.resources is not None:
+            capabilities.resources.subscribe = True
+        return capabilities
+
+    server.get_capabilities = get_subscribable_capabilities
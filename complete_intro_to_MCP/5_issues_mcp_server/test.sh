@@ -30,17 +30,27 @@ case "${1:-job}" in
         echo ""
         npx @modelcontextprotocol/inspector "$VENV_PYTHON" "$SCRIPT_DIR/job_based_server.py"
         ;;
+    "bench"|"benchmark")
+        echo "Load testing both servers against a mock backend..."
+        echo ""
+        "$VENV_PYTHON" "$SCRIPT_DIR/benchmark.py" "${@:2}"
+        ;;
     "help"|"-h"|"--help")
-        echo "Usage: $0 [api|job]"
+        echo "Usage: $0 [api|job|bench [benchmark options]]"
         echo ""
         echo "  api, api-based    - Test the API-based tools version"
         echo "  job, job-based    - Test the job-based tools version (default)"
+        echo "  bench [options]   - Load test both servers; options are passed to"
+        echo "                      benchmark.py (see benchmark.py --help)"
         echo "  help              - Show this help message"
         echo ""
         echo "Examples:"
         echo "  $0                # Test job-based version (default)"
         echo "  $0 job            # Test job-based version"  
         echo "  $0 api            # Test API-based version"
+        echo "  $0 bench          # Load test both servers over stdio and HTTP"
+        echo "  $0 bench --server job --transport http --clients 20"
+        echo "  $0 bench --env ISSUES_CACHE_TTL=0   # Compare with caching off"
         echo ""
         echo "The job-based approach is recommended as it:"
         echo "- Is easier for LLMs to use correctly"
@@ -1,9 +1,10 @@
 import asyncio
 import json
-from contextlib import AsyncExitStack
+import os
+import time
 
 import nest_asyncio
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
 from dotenv import load_dotenv
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
@@ -14,126 +15,229 @@ load_dotenv()
 
 
 class MCP_ChatBot:
-    def __init__(self):
-        self.exit_stack = AsyncExitStack()
-        self.anthropic = Anthropic()
+    def __init__(self, max_concurrent_tools: int = 4, startup_timeout: float = 30.0):
+        self.anthropic = AsyncAnthropic()
         # Tools list required for Anthropic API
         self.available_tools = []
         # Prompts list for quick display
         self.available_prompts = []
         # Sessions dict maps tool/prompt names or resource URIs to MCP client sessions
         self.sessions = {}
-
-    async def connect_to_server(self, server_name, server_config):
+        # Caps how many tool calls from one model turn run at the same time
+        self.tool_semaphore = asyncio.Semaphore(max_concurrent_tools)
+        # Seconds a server gets to start and list its tools, prompts and resources
+        self.startup_timeout = startup_timeout
+        # Each server's process and session live in their own task until shutdown
+        self.server_tasks = []
+        self.shutdown_event = asyncio.Event()
+
+    async def run_server(self, server_name, server_config, ready):
+        """
+        Start a server, report its session and listings through ready, and keep
+        it running until cleanup().
+
+        stdio_client and ClientSession must be exited by the task that entered
+        them, which is why every server gets a task of its own.
+        """
         try:
             server_params = StdioServerParameters(**server_config)
-            stdio_transport = await self.exit_stack.enter_async_context(
-                stdio_client(server_params)
-            )
-            read, write = stdio_transport
-            session = await self.exit_stack.enter_async_context(
-                ClientSession(read, write)
-            )
-            await session.initialize()
-
-            try:
-                # List available tools
-                response = await session.list_tools()
-                for tool in response.tools:
-                    self.sessions[tool.name] = session
-                    self.available_tools.append(
-                        {
-                            "name": tool.name,
-                            "description": tool.description,
-                            "input_schema": tool.inputSchema,
-                        }
+            async with stdio_client(server_params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+
+                    # List available tools, prompts and resources in parallel
+                    listings = await asyncio.gather(
+                        session.list_tools(),
+                        session.list_prompts(),
+                        session.list_resources(),
+                        return_exceptions=True,
                     )
+                    if not ready.done():
+                        ready.set_result((session, *listings))
 
-                # List available prompts
-                prompts_response = await session.list_prompts()
-                if prompts_response and prompts_response.prompts:
-                    for prompt in prompts_response.prompts:
-                        self.sessions[prompt.name] = session
-                        self.available_prompts.append(
-                            {
-                                "name": prompt.name,
-                                "description": prompt.description,
-                                "arguments": prompt.arguments,
-                            }
-                        )
-                # List available resources
-                resources_response = await session.list_resources()
-                if resources_response and resources_response.resources:
-                    for resource in resources_response.resources:
-                        resource_uri = str(resource.uri)
-                        self.sessions[resource_uri] = session
+                    await self.shutdown_event.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                print(f"Server {server_name} stopped: {e}")
 
-            except Exception as e:
-                print(f"Error {e}")
+    async def connect_to_server(self, server_name, server_config):
+        """
+        Start a server and return (listings, status).
+
+        listings is (session, tools, prompts, resources), or None if the server
+        failed to start. Nothing is registered here, see register_server().
+        """
+        ready = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(self.run_server(server_name, server_config, ready))
+        self.server_tasks.append(task)
 
+        started = time.perf_counter()
+        try:
+            session, tools, prompts, resources = await asyncio.wait_for(
+                asyncio.shield(ready), self.startup_timeout
+            )
+        except asyncio.TimeoutError:
+            ready.cancel()
+            task.cancel()
+            print(f"Error connecting to {server_name}: timed out")
+            return None, f"timed out after {self.startup_timeout:.0f}s"
         except Exception as e:
             print(f"Error connecting to {server_name}: {e}")
+            return None, f"failed after {time.perf_counter() - started:.2f}s"
+        elapsed = time.perf_counter() - started
+
+        return (session, tools, prompts, resources), f"ready in {elapsed:.2f}s"
+
+    def register_server(self, session, tools, prompts, resources):
+        """Register a server's tools, prompts and resources; returns their counts."""
+        for response in (tools, prompts, resources):
+            if isinstance(response, Exception):
+                print(f"Error {response}")
+
+        counts = []
+
+        if not isinstance(tools, Exception):
+            for tool in tools.tools:
+                self.sessions[tool.name] = session
+                self.available_tools.append(
+                    {
+                        "name": tool.name,
+                        "description": tool.description,
+                        "input_schema": tool.inputSchema,
+                    }
+                )
+            counts.append(f"{len(tools.tools)} tools")
+
+        if not isinstance(prompts, Exception) and prompts and prompts.prompts:
+            for prompt in prompts.prompts:
+                self.sessions[prompt.name] = session
+                self.available_prompts.append(
+                    {
+                        "name": prompt.name,
+                        "description": prompt.description,
+                        "arguments": prompt.arguments,
+                    }
+                )
+            counts.append(f"{len(prompts.prompts)} prompts")
+
+        if not isinstance(resources, Exception) and resources and resources.resources:
+            for resource in resources.resources:
+                resource_uri = str(resource.uri)
+                self.sessions[resource_uri] = session
+            counts.append(f"{len(resources.resources)} resources")
+
+        return counts
 
     async def connect_to_servers(self):
         try:
             with open("server_config.json", "r") as file:
                 data = json.load(file)
             servers = data.get("mcpServers", {})
-            for server_name, server_config in servers.items():
-                await self.connect_to_server(server_name, server_config)
         except Exception as e:
             print(f"Error loading server config: {e}")
             raise
 
+        # Launch and initialize all servers at once instead of one after another
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(
+                self.connect_to_server(server_name, server_config)
+                for server_name, server_config in servers.items()
+            )
+        )
+
+        # Register in config order rather than the order servers became ready,
+        # so the tool list is the same on every run
+        reports = []
+        for server_name, (listings, status) in zip(servers, results):
+            if listings is not None:
+                status += f" ({', '.join(self.register_server(*listings))})"
+            reports.append(f"{server_name}: {status}")
+
+        print(
+            f"\nStarted {len(servers)} servers in {time.perf_counter() - started:.2f}s"
+        )
+        for report in reports:
+            print(f"- {report}")
+
     async def process_query(self, query):
         messages = [{"role": "user", "content": query}]
 
         while True:
-            response = self.anthropic.messages.create(
-                max_tokens=2024,
-                model="claude-3-7-sonnet-20250219",
-                tools=self.available_tools,
-                messages=messages,
-            )
+            tool_calls = []
 
-            assistant_content = []
-            has_tool_use = False
-
-            for content in response.content:
-                if content.type == "text":
-                    print(content.text)
-                    assistant_content.append(content)
-                elif content.type == "tool_use":
-                    has_tool_use = True
-                    assistant_content.append(content)
-                    messages.append({"role": "assistant", "content": assistant_content})
-
-                    # Get session and call tool
-                    session = self.sessions.get(content.name)
-                    if not session:
-                        print(f"Tool '{content.name}' not found.")
-                        break
-
-                    result = await session.call_tool(
-                        content.name, arguments=content.input
-                    )
-                    messages.append(
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "tool_result",
-                                    "tool_use_id": content.id,
-                                    "content": result.content,
-                                }
-                            ],
-                        }
-                    )
+            try:
+                async with self.anthropic.messages.stream(
+                    max_tokens=2024,
+                    model="claude-3-7-sonnet-20250219",
+                    tools=self.available_tools,
+                    messages=messages,
+                ) as stream:
+                    async for event in stream:
+                        if event.type == "text":
+                            # Print text as it arrives, not after the whole reply
+                            print(event.text, end="", flush=True)
+                        elif event.type == "content_block_stop":
+                            if event.content_block.type == "text":
+                                print()
+                            elif event.content_block.type == "tool_use":
+                                # Start the tool while the rest of the turn streams
+                                tool_calls.append(
+                                    asyncio.create_task(
+                                        self.call_tool(event.content_block)
+                                    )
+                                )
+                    response = await stream.get_final_message()
+            except BaseException:
+                for task in tool_calls:
+                    task.cancel()
+                raise
+
+            messages.append({"role": "assistant", "content": response.content})
 
             # Exit loop if no tool was used
-            if not has_tool_use:
+            if not tool_calls:
                 break
 
+            # Wait for all tool calls of this turn and answer them together
+            tool_results = await asyncio.gather(*tool_calls)
+            messages.append({"role": "user", "content": list(tool_results)})
+
+    async def call_tool(self, tool_use):
+        """Call the tool requested by a tool_use block and wrap the tool_result."""
+        # Get session and call tool
+        session = self.sessions.get(tool_use.name)
+        if not session:
+            print(f"Tool '{tool_use.name}' not found.")
+            return {
+                "type": "tool_result",
+                "tool_use_id": tool_use.id,
+                "content": f"Tool '{tool_use.name}' not found.",
+                "is_error": True,
+            }
+
+        async with self.tool_semaphore:
+            try:
+                result = await session.call_tool(
+                    tool_use.name, arguments=tool_use.input
+                )
+            except Exception as e:
+                print(f"Error calling tool '{tool_use.name}': {e}")
+                return {
+                    "type": "tool_result",
+                    "tool_use_id": tool_use.id,
+                    "content": f"Error calling tool '{tool_use.name}': {e}",
+                    "is_error": True,
+                }
+
+        return {
+            "type": "tool_result",
+            "tool_use_id": tool_use.id,
+            "content": result.content,
+        }
+
     async def get_resource(self, resource_uri):
         session = self.sessions.get(resource_uri)
 
@@ -208,6 +312,7 @@ class MCP_ChatBot:
         print("Type your queries or 'quit' to exit.")
         print("Use @folders to see available topics")
         print("Use @<topic> to search papers in that topic")
+        print("Use @<topic>?cursor=<cursor> to see the next page of a large topic")
         print("Use /prompts to list available prompts")
         print("Use /prompt <name> <arg1=value1> to execute a prompt")
 
@@ -263,11 +368,15 @@ class MCP_ChatBot:
                 print(f"\nError: {str(e)}")
 
     async def cleanup(self):
-        await self.exit_stack.aclose()
+        self.shutdown_event.set()
+        await asyncio.gather(*self.server_tasks, return_exceptions=True)
 
 
 async def main():
-    chatbot = MCP_ChatBot()
+    chatbot = MCP_ChatBot(
+        max_concurrent_tools=int(os.getenv("MAX_CONCURRENT_TOOLS", "4")),
+        startup_timeout=float(os.getenv("SERVER_STARTUP_TIMEOUT", "30")),
+    )
     try:
         await chatbot.connect_to_servers()
         await chatbot.chat_loop()
@@ -0,0 +1,738 @@
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import Counter
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+
+class TopicPage(NamedTuple):
+    """One page of a topic's papers, in the order they were added."""
+
+    total: int
+    # Number of papers in the topic before this page
+    start: int
+    papers: List[Tuple[str, dict]]
+    # Pass back to get_topic_page for the following page; None on the last page
+    next_cursor: Optional[str]
+
+
+class PaperStore(ABC):
+    """Storage backend for the papers found by the research server."""
+
+    @abstractmethod
+    def save_papers(self, topic: str, papers: Dict[str, dict]) -> None:
+        """
+        Add or update papers under a topic.
+
+        Args:
+            topic: The topic directory name (e.g. "large_language_models")
+            papers: Mapping of paper ID to paper information
+        """
+
+    @abstractmethod
+    def get_paper(self, paper_id: str) -> Optional[dict]:
+        """Return the information stored for a paper, or None if unknown."""
+
+    @abstractmethod
+    def list_topics(self) -> List[str]:
+        """Return the names of all topics that have papers."""
+
+    @abstractmethod
+    def get_topic_papers(self, topic: str) -> Optional[Dict[str, dict]]:
+        """Return the papers of a topic in insertion order, or None if unknown."""
+
+    @abstractmethod
+    def get_topic_page(
+        self, topic: str, cursor: Optional[str] = None, limit: int = 20
+    ) -> TopicPage:
+        """
+        Return up to limit papers of a topic, starting after cursor.
+
+        Args:
+            topic: The topic directory name
+            cursor: next_cursor of the previous page, or None for the first page
+            limit: Maximum number of papers in the page
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+
+    @abstractmethod
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, dict]]:
+        """
+        Full-text search over the titles, authors and summaries of all papers.
+
+        Args:
+            query: Free text; papers matching more (and rarer) words rank higher
+            limit: Maximum number of papers to return
+
+        Returns:
+            (paper ID, paper information) pairs, best match first
+        """
+
+    @abstractmethod
+    def version(self, topic: Optional[str] = None) -> Hashable:
+        """
+        Return a token that changes whenever the stored papers change.
+
+        Args:
+            topic: Only track changes to this topic; None tracks the whole store
+        """
+
+    def location(self, topic: str) -> str:
+        """Human readable description of where a topic's papers are kept."""
+        return self.path
+
+
+def tokenize(text: str) -> List[str]:
+    return re.findall(r"\w+", text.lower())
+
+
+def paper_text(paper_info: dict) -> str:
+    """The searchable text of a paper: title, authors and summary."""
+    return " ".join(
+        [paper_info["title"], " ".join(paper_info["authors"]), paper_info["summary"]]
+    )
+
+
+class Bm25Index:
+    """In-memory inverted index ranking documents with Okapi BM25."""
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self):
+        # term -> {doc_id: term frequency}
+        self.postings = {}
+        self.doc_lengths = {}
+        self.doc_terms = {}
+        self.total_length = 0
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Index a document, replacing any previous version of it."""
+        self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        for term, count in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = count
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self.doc_terms[doc_id] = list(terms)
+        self.total_length += length
+
+    def remove(self, doc_id: str) -> None:
+        if doc_id not in self.doc_lengths:
+            return
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        for term in self.doc_terms.pop(doc_id):
+            docs = self.postings[term]
+            del docs[doc_id]
+            if not docs:
+                del self.postings[term]
+
+    def search(self, query: str, limit: int) -> List[str]:
+        """Return the IDs of the best matching documents, best first."""
+        count = len(self.doc_lengths)
+        if not count:
+            return []
+        average_length = self.total_length / count
+
+        scores = Counter()
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, frequency in docs.items():
+                norm = self.K1 * (
+                    1 - self.B + self.B * self.doc_lengths[doc_id] / average_length
+                )
+                scores[doc_id] += idf * frequency * (self.K1 + 1) / (frequency + norm)
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [doc_id for doc_id, _ in best]
+
+
+class JsonPaperStore(PaperStore):
+    """
+    One papers/<topic>/papers_info.json file per topic.
+
+    Every paper's byte offset inside its topic file is kept in an index so
+    lookups by ID read just that record.
+    """
+
+    def __init__(self, paper_dir: str):
+        self.path = paper_dir
+        self.index_file = os.path.join(paper_dir, ".paper_index.json")
+        # paper_id -> [topic, byte offset, byte length] of its record in
+        # papers_info.json, plus the (mtime_ns, size) of every topic file the
+        # offsets were computed from
+        self.index = {"topics": {}, "papers": {}}
+        # topic -> paper IDs in file order, derived from the index on demand
+        self.topic_order = {}
+        # Full-text index, built on the first search and then kept up to date
+        self.search_index = None
+        self.search_version = None
+        self.load_index()
+
+    def _topic_file(self, topic: str) -> str:
+        return os.path.join(self.path, topic, "papers_info.json")
+
+    @staticmethod
+    def _file_stamp(file_path: str) -> Optional[List[int]]:
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return None
+        return [stat.st_mtime_ns, stat.st_size]
+
+    def _read_topic(self, topic: str) -> Optional[Dict[str, dict]]:
+        try:
+            with open(self._topic_file(topic), "r") as json_file:
+                return json.load(json_file)
+        except FileNotFoundError:
+            return None
+        except json.JSONDecodeError as e:
+            print(f"Error reading {self._topic_file(topic)}: {str(e)}")
+            return None
+
+    def _write_topic(self, topic: str, papers_info: Dict[str, dict]) -> None:
+        """
+        Write a topic's papers_info.json and record where each paper lives in it.
+
+        The output is byte-for-byte what json.dump(..., indent=2) produces, but
+        serialized record by record so the offset of every paper is known.
+        """
+        file_path = self._topic_file(topic)
+
+        chunks = []
+        offsets = {}
+        position = 2  # len("{\n")
+        for paper_id, paper_info in papers_info.items():
+            key = f"  {json.dumps(paper_id)}: "
+            record = json.dumps(paper_info, indent=2).replace("\n", "\n  ")
+            offsets[paper_id] = [topic, position + len(key), len(record)]
+            chunk = key + record
+            chunks.append(chunk)
+            position += len(chunk) + 2  # len(",\n")
+        content = "{\n" + ",\n".join(chunks) + "\n}" if chunks else "{}"
+
+        # json.dumps escapes non-ASCII by default, so characters == bytes here
+        with open(file_path, "w", encoding="ascii", newline="") as json_file:
+            json_file.write(content)
+
+        papers = self.index["papers"]
+        for paper_id, entry in list(papers.items()):
+            if entry[0] == topic and paper_id not in offsets:
+                del papers[paper_id]
+        papers.update(offsets)
+        self.index["topics"][topic] = self._file_stamp(file_path)
+        self.topic_order[topic] = list(offsets)
+
+    def save_index(self) -> None:
+        """Persist the paper index next to the topic directories."""
+        tmp_path = self.index_file + ".tmp"
+        with open(tmp_path, "w") as index_file:
+            json.dump(self.index, index_file)
+        os.replace(tmp_path, self.index_file)
+
+    def load_index(self) -> None:
+        """
+        Load the persisted paper index, re-indexing any topic whose file has changed.
+
+        Topic files that were edited by hand or written by an older version of
+        the server are re-serialized in the canonical layout so their offsets
+        are valid.
+        """
+        if not self.index["topics"]:
+            try:
+                with open(self.index_file, "r") as index_file:
+                    self.index = json.load(index_file)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self.index = {"topics": {}, "papers": {}}
+
+        if not os.path.isdir(self.path):
+            return
+
+        current_topics = set()
+        changed = False
+        for topic in os.listdir(self.path):
+            file_path = self._topic_file(topic)
+            if not os.path.isfile(file_path):
+                continue
+            current_topics.add(topic)
+            if self.index["topics"].get(topic) == self._file_stamp(file_path):
+                continue
+            papers_info = self._read_topic(topic)
+            if papers_info is None:
+                continue
+            self._write_topic(topic, papers_info)
+            changed = True
+
+        for topic in set(self.index["topics"]) - current_topics:
+            del self.index["topics"][topic]
+            self.topic_order.pop(topic, None)
+            self.index["papers"] = {
+                paper_id: entry
+                for paper_id, entry in self.index["papers"].items()
+                if entry[0] != topic
+            }
+            changed = True
+
+        if changed:
+            self.save_index()
+
+    def save_papers(self, topic: str, papers: Dict[str, dict]) -> None:
+        in_sync = (
+            self.search_index is not None and self.search_version == self.version()
+        )
+
+        os.makedirs(os.path.join(self.path, topic), exist_ok=True)
+        papers_info = self._read_topic(topic) or {}
+        papers_info.update(papers)
+        self._write_topic(topic, papers_info)
+        self.save_index()
+
+        # Only patch the search index if nothing else changed the files meanwhile
+        if in_sync:
+            for paper_id, paper_info in papers.items():
+                self.search_index.add(paper_id, paper_text(paper_info))
+            self.search_version = self.version()
+
+    def _read_record(self, json_file, entry: List) -> dict:
+        _, offset, length = entry
+        json_file.seek(offset)
+        return json.loads(json_file.read(length))
+
+    def get_paper(self, paper_id: str) -> Optional[dict]:
+        entry = self.index["papers"].get(paper_id)
+        if entry is None or self.index["topics"].get(entry[0]) != self._file_stamp(
+            self._topic_file(entry[0])
+        ):
+            # Unknown ID or a topic file changed behind our back: pick up any
+            # changes on disk (only modified topics are re-read) and look again
+            self.load_index()
+            entry = self.index["papers"].get(paper_id)
+
+        if entry is None:
+            return None
+
+        file_path = self._topic_file(entry[0])
+        try:
+            with open(file_path, "rb") as json_file:
+                return self._read_record(json_file, entry)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"Error reading {file_path}: {str(e)}")
+            return None
+
+    def list_topics(self) -> List[str]:
+        if not os.path.exists(self.path):
+            return []
+        return [
+            topic
+            for topic in os.listdir(self.path)
+            if os.path.isfile(self._topic_file(topic))
+        ]
+
+    def get_topic_papers(self, topic: str) -> Optional[Dict[str, dict]]:
+        return self._read_topic(topic)
+
+    def get_topic_page(
+        self, topic: str, cursor: Optional[str] = None, limit: int = 20
+    ) -> TopicPage:
+        # The cursor is simply the position of the next paper in the file
+        start = int(cursor) if cursor else 0
+        if start < 0:
+            raise ValueError(f"Invalid cursor: {cursor}")
+
+        file_path = self._topic_file(topic)
+        if self.index["topics"].get(topic) != self._file_stamp(file_path):
+            self.load_index()
+
+        order = self.topic_order.get(topic)
+        if order is None:
+            entries = [
+                (entry[1], paper_id)
+                for paper_id, entry in self.index["papers"].items()
+                if entry[0] == topic
+            ]
+            order = self.topic_order[topic] = [
+                paper_id for _, paper_id in sorted(entries)
+            ]
+
+        page_ids = order[start : start + limit]
+        papers = []
+        if page_ids:
+            with open(file_path, "rb") as json_file:
+                for paper_id in page_ids:
+                    entry = self.index["papers"][paper_id]
+                    papers.append((paper_id, self._read_record(json_file, entry)))
+
+        end = start + len(page_ids)
+        next_cursor = str(end) if end < len(order) else None
+        return TopicPage(len(order), start, papers, next_cursor)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, dict]]:
+        version = self.version()
+        if self.search_index is None or self.search_version != version:
+            self.search_index = Bm25Index()
+            for topic in self.list_topics():
+                for paper_id, paper_info in (self._read_topic(topic) or {}).items():
+                    self.search_index.add(paper_id, paper_text(paper_info))
+            self.search_version = version
+
+        results = []
+        for paper_id in self.search_index.search(query, limit):
+            paper_info = self.get_paper(paper_id)
+            if paper_info is not None:
+                results.append((paper_id, paper_info))
+        return results
+
+    def version(self, topic: Optional[str] = None) -> Hashable:
+        if topic is not None:
+            return tuple(self._file_stamp(self._topic_file(topic)) or ())
+        return tuple(
+            (topic, *self._file_stamp(self._topic_file(topic)))
+            for topic in sorted(self.list_topics())
+        )
+
+    def location(self, topic: str) -> str:
+        return self._topic_file(topic)
+
+
+class SqlitePaperStore(PaperStore):
+    """
+    Papers, authors and topic membership in a single SQLite database.
+
+    The database runs in WAL mode so resource reads are not blocked while
+    search results are being written.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS papers (
+        id INTEGER PRIMARY KEY,
+        paper_id TEXT NOT NULL UNIQUE,
+        title TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        pdf_url TEXT NOT NULL,
+        published TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS authors (
+        author_id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS paper_authors (
+        paper_id TEXT NOT NULL REFERENCES papers(paper_id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        author_id INTEGER NOT NULL REFERENCES authors(author_id),
+        PRIMARY KEY (paper_id, position)
+    );
+    CREATE TABLE IF NOT EXISTS paper_topics (
+        id INTEGER PRIMARY KEY,
+        topic TEXT NOT NULL,
+        paper_id TEXT NOT NULL REFERENCES papers(paper_id) ON DELETE CASCADE,
+        UNIQUE (topic, paper_id)
+    );
+    -- Every SQLite index ends with the rowid, which id aliases, so this also
+    -- orders a topic's papers by insertion for keyset pagination
+    CREATE INDEX IF NOT EXISTS paper_topics_by_topic ON paper_topics (topic);
+    CREATE TABLE IF NOT EXISTS store_meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    -- Full-text index over papers, keyed by papers.id
+    CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5 (
+        title, authors, summary, tokenize = 'unicode61'
+    );
+    """
+
+    def __init__(self, db_path: str):
+        self.path = db_path
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT value FROM store_meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO store_meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    def save_papers(self, topic: str, papers: Dict[str, dict]) -> None:
+        with self.conn:
+            for paper_id, paper_info in papers.items():
+                self.conn.execute(
+                    """
+                    INSERT INTO papers (paper_id, title, summary, pdf_url, published)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(paper_id) DO UPDATE SET
+                        title = excluded.title,
+                        summary = excluded.summary,
+                        pdf_url = excluded.pdf_url,
+                        published = excluded.published
+                    """,
+                    (
+                        paper_id,
+                        paper_info["title"],
+                        paper_info["summary"],
+                        paper_info["pdf_url"],
+                        paper_info["published"],
+                    ),
+                )
+
+                self.conn.execute(
+                    "DELETE FROM paper_authors WHERE paper_id = ?", (paper_id,)
+                )
+                for position, name in enumerate(paper_info["authors"]):
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO authors (name) VALUES (?)", (name,)
+                    )
+                    self.conn.execute(
+                        """
+                        INSERT INTO paper_authors (paper_id, position, author_id)
+                        SELECT ?, ?, author_id FROM authors WHERE name = ?
+                        """,
+                        (paper_id, position, name),
+                    )
+
+                self.conn.execute(
+                    """
+                    DELETE FROM papers_fts
+                    WHERE rowid = (SELECT id FROM papers WHERE paper_id = ?)
+                    """,
+                    (paper_id,),
+                )
+                self.conn.execute(
+                    """
+                    INSERT INTO papers_fts (rowid, title, authors, summary)
+                    SELECT id, title, ?, summary FROM papers WHERE paper_id = ?
+                    """,
+                    (" ".join(paper_info["authors"]), paper_id),
+                )
+
+                # Re-found papers keep their original position in the topic
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO paper_topics (topic, paper_id) VALUES (?, ?)",
+                    (topic, paper_id),
+                )
+
+            # Bump the generation counters readers use to detect changes
+            for key in ("generation", f"generation:{topic}"):
+                self.conn.execute(
+                    "INSERT INTO store_meta (key, value) VALUES (?, '1') "
+                    "ON CONFLICT(key) DO UPDATE SET value = value + 1",
+                    (key,),
+                )
+
+    def _authors(self, paper_id: str) -> List[str]:
+        rows = self.conn.execute(
+            """
+            SELECT a.name FROM paper_authors pa
+            JOIN authors a ON a.author_id = pa.author_id
+            WHERE pa.paper_id = ?
+            ORDER BY pa.position
+            """,
+            (paper_id,),
+        )
+        return [row["name"] for row in rows]
+
+    def _authors_of(self, paper_ids: List[str]) -> Dict[str, List[str]]:
+        authors = {paper_id: [] for paper_id in paper_ids}
+        placeholders = ", ".join("?" for _ in paper_ids)
+        rows = self.conn.execute(
+            f"""
+            SELECT pa.paper_id, a.name FROM paper_authors pa
+            JOIN authors a ON a.author_id = pa.author_id
+            WHERE pa.paper_id IN ({placeholders})
+            ORDER BY pa.paper_id, pa.position
+            """,
+            paper_ids,
+        )
+        for row in rows:
+            authors[row["paper_id"]].append(row["name"])
+        return authors
+
+    def _paper_info(
+        self, row: sqlite3.Row, authors: Optional[List[str]] = None
+    ) -> dict:
+        return {
+            "title": row["title"],
+            "authors": self._authors(row["paper_id"]) if authors is None else authors,
+            "summary": row["summary"],
+            "pdf_url": row["pdf_url"],
+            "published": row["published"],
+        }
+
+    def get_paper(self, paper_id: str) -> Optional[dict]:
+        row = self.conn.execute(
+            "SELECT * FROM papers WHERE paper_id = ?", (paper_id,)
+        ).fetchone()
+        return self._paper_info(row) if row else None
+
+    def list_topics(self) -> List[str]:
+        rows = self.conn.execute(
+            "SELECT topic FROM paper_topics GROUP BY topic ORDER BY MIN(id)"
+        )
+        return [row["topic"] for row in rows]
+
+    def get_topic_papers(self, topic: str) -> Optional[Dict[str, dict]]:
+        rows = self.conn.execute(
+            """
+            SELECT p.* FROM paper_topics pt
+            JOIN papers p ON p.paper_id = pt.paper_id
+            WHERE pt.topic = ?
+            ORDER BY pt.id
+            """,
+            (topic,),
+        ).fetchall()
+        if not rows:
+            return None
+        return {row["paper_id"]: self._paper_info(row) for row in rows}
+
+    def get_topic_page(
+        self, topic: str, cursor: Optional[str] = None, limit: int = 20
+    ) -> TopicPage:
+        # The cursor is the paper_topics id of the last paper returned
+        after = int(cursor) if cursor else 0
+
+        total, start = self.conn.execute(
+            "SELECT COUNT(*), COUNT(*) FILTER (WHERE id <= ?) "
+            "FROM paper_topics WHERE topic = ?",
+            (after, topic),
+        ).fetchone()
+        rows = self.conn.execute(
+            """
+            SELECT pt.id AS position, p.* FROM paper_topics pt
+            JOIN papers p ON p.paper_id = pt.paper_id
+            WHERE pt.topic = ? AND pt.id > ?
+            ORDER BY pt.id
+            LIMIT ?
+            """,
+            (topic, after, limit + 1),
+        ).fetchall()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        authors = self._authors_of([row["paper_id"] for row in rows]) if rows else {}
+        papers = [
+            (row["paper_id"], self._paper_info(row, authors[row["paper_id"]]))
+            for row in rows
+        ]
+        next_cursor = str(rows[-1]["position"]) if has_more else None
+        return TopicPage(total, start, papers, next_cursor)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, dict]]:
+        # Quote every word so user input can't be parsed as FTS5 query syntax
+        terms = {term.replace('"', '""') for term in tokenize(query)}
+        if not terms:
+            return []
+        match = " OR ".join(f'"{term}"' for term in terms)
+
+        rows = self.conn.execute(
+            """
+            SELECT p.* FROM papers_fts
+            JOIN papers p ON p.id = papers_fts.rowid
+            WHERE papers_fts MATCH ?
+            ORDER BY bm25(papers_fts, 10.0, 5.0, 1.0)
+            LIMIT ?
+            """,
+            (match, limit),
+        ).fetchall()
+
+        authors = self._authors_of([row["paper_id"] for row in rows]) if rows else {}
+        return [
+            (row["paper_id"], self._paper_info(row, authors[row["paper_id"]]))
+            for row in rows
+        ]
+
+    def version(self, topic: Optional[str] = None) -> Hashable:
+        key = "generation" if topic is None else f"generation:{topic}"
+        return self.get_meta(key) or "0"
+
+    def location(self, topic: str) -> str:
+        return f"{self.path} (topic: {topic})"
+
+
+def migrate_json_tree(paper_dir: str, store: PaperStore) -> int:
+    """
+    Copy every papers/<topic>/papers_info.json file into another store.
+
+    Args:
+        paper_dir: Directory holding the per-topic JSON files
+        store: The store to copy the papers into
+
+    Returns:
+        Number of papers copied
+    """
+    if not os.path.isdir(paper_dir):
+        return 0
+
+    count = 0
+    for topic in os.listdir(paper_dir):
+        file_path = os.path.join(paper_dir, topic, "papers_info.json")
+        if not os.path.isfile(file_path):
+            continue
+        try:
+            with open(file_path, "r") as json_file:
+                papers = json.load(json_file)
+        except json.JSONDecodeError as e:
+            print(f"Error reading {file_path}: {str(e)}")
+            continue
+        if papers:
+            store.save_papers(topic, papers)
+            count += len(papers)
+    return count
+
+
+def open_store(paper_dir: str, backend: str = "sqlite") -> PaperStore:
+    """
+    Open the paper store for the given backend ("sqlite" or "json").
+
+    The first time the SQLite store is opened, papers saved by the JSON
+    backend in paper_dir are migrated into it.
+    """
+    if backend == "json":
+        return JsonPaperStore(paper_dir)
+    if backend != "sqlite":
+        raise ValueError(f"Unknown paper store backend: {backend}")
+
+    store = SqlitePaperStore(os.path.join(paper_dir, "papers.db"))
+    if store.get_meta("json_migrated") is None:
+        migrate_json_tree(paper_dir, store)
+        store.set_meta("json_migrated", "1")
+    return store
+
+
+if __name__ == "__main__":
+    import sys
+
+    # One-shot migration: python paper_store.py [papers_dir] [db_path]
+    paper_dir = sys.argv[1] if len(sys.argv) > 1 else "papers"
+    db_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(paper_dir, "papers.db")
+
+    store = SqlitePaperStore(db_path)
+    migrated = migrate_json_tree(paper_dir, store)
+    store.set_meta("json_migrated", "1")
+    store.close()
+    print(f"Migrated {migrated} papers from {paper_dir} into {db_path}")
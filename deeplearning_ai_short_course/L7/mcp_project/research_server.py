@@ -1,72 +1,175 @@
+import asyncio
 import json
 import os
-from typing import List
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Literal, Optional
+from urllib.parse import parse_qs
 
 import arxiv
 from mcp.server.fastmcp import FastMCP
 
+from paper_store import TopicPage, open_store
+
 PAPER_DIR = "papers"
+PAPER_STORE = os.getenv("PAPER_STORE", "sqlite")
+# Papers per page of the papers://{topic} resource
+TOPIC_PAGE_SIZE = 20
+MAX_TOPIC_PAGE_SIZE = 100
+# Rendered resources kept in memory
+RESOURCE_CACHE_SIZE = 128
 
 # Initialize FastMCP server
 mcp = FastMCP("research")
 
+# Papers are kept in papers/papers.db (or per-topic JSON files with PAPER_STORE=json)
+store = open_store(PAPER_DIR, PAPER_STORE)
 
-@mcp.tool()
-def search_papers(topic: str, max_results: int = 5) -> List[str]:
+
+# Rendered resources: cache key -> (store version, markdown)
+resource_cache = OrderedDict()
+
+
+def cached_render(key: tuple, version: Hashable, render: Callable[[], str]) -> str:
     """
-    Search for papers on arXiv based on a topic and store their information.
+    Return the cached rendering for key if the data hasn't changed since.
+
+    Args:
+        key: Identifies the resource, its first element is the topic (or None)
+        version: The store version the rendering depends on
+        render: Builds the markdown when the cache is missing or stale
+    """
+    cached = resource_cache.get(key)
+    if cached is not None and cached[0] == version:
+        resource_cache.move_to_end(key)
+        return cached[1]
+
+    content = render()
+    resource_cache[key] = (version, content)
+    resource_cache.move_to_end(key)
+    while len(resource_cache) > RESOURCE_CACHE_SIZE:
+        resource_cache.popitem(last=False)
+    return content
+
+
+def invalidate_resources(topic: str):
+    """Drop the cached renderings that show the given topic."""
+    for key in list(resource_cache):
+        if key[0] in (None, topic):
+            del resource_cache[key]
+
+
+# One long-lived client so arXiv's rate limiting is shared across searches;
+# its paging/rate-limit state isn't thread safe, so fetches take turns on it
+arxiv_client = arxiv.Client()
+arxiv_lock = threading.Lock()
+
+# Recent search results: (topic, max_results, sort) -> (expires_at, papers_info)
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "256"))
+search_cache = OrderedDict()
+# Searches currently waiting on arXiv, shared by identical concurrent calls
+pending_searches = {}
+
+
+def _fetch_papers(
+    query: str, max_results: int, sort_by: arxiv.SortCriterion
+) -> Dict[str, dict]:
+    """Run an arXiv search (blocking) and return paper ID -> paper information."""
+    search = arxiv.Search(query=query, max_results=max_results, sort_by=sort_by)
+
+    papers_info = {}
+    with arxiv_lock:
+        for paper in arxiv_client.results(search):
+            papers_info[paper.get_short_id()] = {
+                "title": paper.title,
+                "authors": [author.name for author in paper.authors],
+                "summary": paper.summary,
+                "pdf_url": paper.pdf_url,
+                "published": str(paper.published.date()),
+            }
+    return papers_info
+
+
+async def _fetch_and_cache(key: tuple, sort_by: arxiv.SortCriterion) -> Dict[str, dict]:
+    query, max_results, _ = key
+    papers_info = await asyncio.to_thread(_fetch_papers, query, max_results, sort_by)
+
+    search_cache[key] = (time.monotonic() + SEARCH_CACHE_TTL, papers_info)
+    search_cache.move_to_end(key)
+    while len(search_cache) > SEARCH_CACHE_SIZE:
+        search_cache.popitem(last=False)
+
+    return papers_info
+
+
+async def fetch_papers(
+    topic: str, max_results: int, sort_by: arxiv.SortCriterion
+) -> Dict[str, dict]:
+    """
+    Search arXiv without blocking the event loop.
+
+    Results are cached for SEARCH_CACHE_TTL seconds, and concurrent calls for
+    the same search wait on a single arXiv request.
 
     Args:
         topic: The topic to search for
-        max_results: Maximum number of results to retrieve (default: 5)
+        max_results: Maximum number of results to retrieve
+        sort_by: How arXiv should order the results
 
     Returns:
-        List of paper IDs found in the search
+        Mapping of paper ID to paper information, in arXiv's order
     """
+    key = (" ".join(topic.lower().split()), max_results, sort_by.value)
 
-    # Use arxiv to find the papers
-    client = arxiv.Client()
+    cached = search_cache.get(key)
+    if cached is not None:
+        expires_at, papers_info = cached
+        if expires_at > time.monotonic():
+            search_cache.move_to_end(key)
+            return papers_info
+        del search_cache[key]
 
-    # Search for the most relevant articles matching the queried topic
-    search = arxiv.Search(
-        query=topic, max_results=max_results, sort_by=arxiv.SortCriterion.Relevance
-    )
+    task = pending_searches.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_and_cache(key, sort_by))
+        pending_searches[key] = task
+        task.add_done_callback(lambda _: pending_searches.pop(key, None))
 
-    papers = client.results(search)
+    # Shielded so one caller giving up doesn't cancel the search for the others
+    return await asyncio.shield(task)
 
-    # Create directory for this topic
-    path = os.path.join(PAPER_DIR, topic.lower().replace(" ", "_"))
-    os.makedirs(path, exist_ok=True)
 
-    file_path = os.path.join(path, "papers_info.json")
+@mcp.tool()
+async def search_papers(
+    topic: str,
+    max_results: int = 5,
+    sort_by: Literal["relevance", "lastUpdatedDate", "submittedDate"] = "relevance",
+) -> List[str]:
+    """
+    Search for papers on arXiv based on a topic and store their information.
 
-    # Try to load existing papers info
-    try:
-        with open(file_path, "r") as json_file:
-            papers_info = json.load(json_file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        papers_info = {}
+    Args:
+        topic: The topic to search for
+        max_results: Maximum number of results to retrieve (default: 5)
+        sort_by: Result order: relevance, lastUpdatedDate or submittedDate (default: relevance)
 
-    # Process each paper and add to papers_info
-    paper_ids = []
-    for paper in papers:
-        paper_ids.append(paper.get_short_id())
-        paper_info = {
-            "title": paper.title,
-            "authors": [author.name for author in paper.authors],
-            "summary": paper.summary,
-            "pdf_url": paper.pdf_url,
-            "published": str(paper.published.date()),
-        }
-        papers_info[paper.get_short_id()] = paper_info
+    Returns:
+        List of paper IDs found in the search
+    """
 
-    # Save updated papers_info to json file
-    with open(file_path, "w") as json_file:
-        json.dump(papers_info, json_file, indent=2)
+    # Use arxiv to find the papers (served from the cache for repeated searches)
+    papers_info = await fetch_papers(topic, max_results, arxiv.SortCriterion(sort_by))
 
-    print(f"Results are saved in: {file_path}")
+    # Upsert the papers into the store under this topic
+    topic_dir = topic.lower().replace(" ", "_")
+    store.save_papers(topic_dir, papers_info)
+    invalidate_resources(topic_dir)
 
-    return paper_ids
+    print(f"Results are saved in: {store.location(topic_dir)}")
+
+    return list(papers_info)
 
 
 @mcp.tool()
@@ -81,23 +184,39 @@ def extract_info(paper_id: str) -> str:
         JSON string with paper information if found, error message if not found
     """
 
-    for item in os.listdir(PAPER_DIR):
-        item_path = os.path.join(PAPER_DIR, item)
-        if os.path.isdir(item_path):
-            file_path = os.path.join(item_path, "papers_info.json")
-            if os.path.isfile(file_path):
-                try:
-                    with open(file_path, "r") as json_file:
-                        papers_info = json.load(json_file)
-                        if paper_id in papers_info:
-                            return json.dumps(papers_info[paper_id], indent=2)
-                except (FileNotFoundError, json.JSONDecodeError) as e:
-                    print(f"Error reading {file_path}: {str(e)}")
-                    continue
+    paper_info = store.get_paper(paper_id)
+    if paper_info is not None:
+        return json.dumps(paper_info, indent=2)
 
     return f"There's no saved information related to paper {paper_id}."
 
 
+@mcp.tool()
+def search_local_papers(query: str, limit: int = 10) -> str:
+    """
+    Search the titles, authors and summaries of papers that were already saved.
+
+    This answers from local storage without contacting arXiv, so try it before
+    search_papers when the papers may have been found in an earlier search.
+
+    Args:
+        query: Words to look for
+        limit: Maximum number of papers to return (default: 10)
+
+    Returns:
+        JSON string with the best matching papers, or a message if none match
+    """
+    results = store.search(query, max(1, min(limit, 50)))
+    if not results:
+        return f"No saved papers match '{query}'. Use search_papers to search arXiv."
+
+    papers = []
+    for paper_id, paper_info in results:
+        paper_info["summary"] = paper_info["summary"][:500] + "..."
+        papers.append({"paper_id": paper_id, **paper_info})
+    return json.dumps(papers, indent=2)
+
+
 @mcp.resource("papers://folders")
 def get_available_folders() -> str:
     """
@@ -105,16 +224,11 @@ def get_available_folders() -> str:
 
     This resource provides a simple list of all available topic folders.
     """
-    folders = []
+    return cached_render((None, "folders"), store.version(), render_folders)
+
 
-    # Get all topic directories
-    if os.path.exists(PAPER_DIR):
-        for topic_dir in os.listdir(PAPER_DIR):
-            topic_path = os.path.join(PAPER_DIR, topic_dir)
-            if os.path.isdir(topic_path):
-                papers_file = os.path.join(topic_path, "papers_info.json")
-                if os.path.exists(papers_file):
-                    folders.append(topic_dir)
+def render_folders() -> str:
+    folders = store.list_topics()
 
     # Create a simple markdown list
     content = "# Available Topics\n\n"
@@ -128,42 +242,66 @@ def get_available_folders() -> str:
     return content
 
 
+def render_topic_page(topic: str, page: TopicPage, limit: int):
+    """Yield the markdown for one page of a topic's papers, piece by piece."""
+    yield f"# Papers on {topic.replace('_', ' ').title()}\n\n"
+    if page.papers:
+        yield (
+            f"Total papers: {page.total} "
+            f"(showing {page.start + 1}-{page.start + len(page.papers)})\n\n"
+        )
+    else:
+        yield f"Total papers: {page.total}\n\n"
+
+    for paper_id, paper_info in page.papers:
+        yield f"## {paper_info['title']}\n"
+        yield f"- **Paper ID**: {paper_id}\n"
+        yield f"- **Authors**: {', '.join(paper_info['authors'])}\n"
+        yield f"- **Published**: {paper_info['published']}\n"
+        yield f"- **PDF URL**: [{paper_info['pdf_url']}]({paper_info['pdf_url']})\n\n"
+        yield f"### Summary\n{paper_info['summary'][:500]}...\n\n"
+        yield "---\n\n"
+
+    if page.next_cursor is not None:
+        yield f"Next page: papers://{topic}?cursor={page.next_cursor}&limit={limit}\n"
+
+
 @mcp.resource("papers://{topic}")
 def get_topic_papers(topic: str) -> str:
     """
     Get detailed information about papers on a specific topic.
 
+    Large topics are paginated: papers://{topic}?cursor=...&limit=... returns
+    the page after the given cursor, and every page ends with a link to the next.
+
     Args:
         topic: The research topic to retrieve papers for
     """
-    topic_dir = topic.lower().replace(" ", "_")
-    papers_file = os.path.join(PAPER_DIR, topic_dir, "papers_info.json")
+    # The URI template can't express query parameters, so they arrive in topic
+    topic, _, query = topic.partition("?")
+    params = parse_qs(query)
+    cursor = params.get("cursor", [None])[0]
 
-    if not os.path.exists(papers_file):
+    try:
+        limit = int(params.get("limit", [TOPIC_PAGE_SIZE])[0])
+        limit = max(1, min(limit, MAX_TOPIC_PAGE_SIZE))
+        topic_dir = topic.lower().replace(" ", "_")
+        return cached_render(
+            (topic_dir, topic, cursor, limit),
+            store.version(topic_dir),
+            lambda: render_topic(topic, topic_dir, cursor, limit),
+        )
+    except ValueError:
+        return f"# Invalid page request for topic: {topic}\n\nCheck the cursor and limit parameters."
+
+
+def render_topic(topic: str, topic_dir: str, cursor: Optional[str], limit: int) -> str:
+    page = store.get_topic_page(topic_dir, cursor, limit)
+
+    if page.total == 0:
         return f"# No papers found for topic: {topic}\n\nTry searching for papers on this topic first."
 
-    try:
-        with open(papers_file, "r") as f:
-            papers_data = json.load(f)
-
-        # Create markdown content with paper details
-        content = f"# Papers on {topic.replace('_', ' ').title()}\n\n"
-        content += f"Total papers: {len(papers_data)}\n\n"
-
-        for paper_id, paper_info in papers_data.items():
-            content += f"## {paper_info['title']}\n"
-            content += f"- **Paper ID**: {paper_id}\n"
-            content += f"- **Authors**: {', '.join(paper_info['authors'])}\n"
-            content += f"- **Published**: {paper_info['published']}\n"
-            content += (
-                f"- **PDF URL**: [{paper_info['pdf_url']}]({paper_info['pdf_url']})\n\n"
-            )
-            content += f"### Summary\n{paper_info['summary'][:500]}...\n\n"
-            content += "---\n\n"
-
-        return content
-    except json.JSONDecodeError:
-        return f"# Error reading papers data for {topic}\n\nThe papers data file is corrupted."
+    return "".join(render_topic_page(topic, page, limit))
 
 
 @mcp.prompt()
@@ -1,6 +1,9 @@
+import asyncio
 import json
 import os
-from typing import List
+import tempfile
+from collections import defaultdict
+from typing import Dict, List
 
 import arxiv
 from mcp.server.fastmcp import FastMCP
@@ -11,19 +14,96 @@ PAPER_DIR = "papers"
 mcp = FastMCP("research", port=8001)
 
 
-@mcp.tool()
-def search_papers(topic: str, max_results: int = 5) -> List[str]:
+class TopicWriter:
     """
-    Search for papers on arXiv based on a topic and store their information.
+    Serializes writes to each topic's papers_info.json.
 
-    Args:
-        topic: The topic to search for
-        max_results: Maximum number of results to retrieve (default: 5)
-
-    Returns:
-        List of paper IDs found in the search
+    Updates for a topic that arrive while a write is in progress are merged
+    and flushed together in a single read-modify-write once it finishes.
+    Files are replaced atomically, so readers never see a partial file.
     """
 
+    def __init__(self, paper_dir: str):
+        self.paper_dir = paper_dir
+        self.locks = defaultdict(asyncio.Lock)
+        # topic -> papers waiting for the next flush, and the callers waiting on it
+        self.pending = {}
+        self.waiters = {}
+
+    async def save(self, topic: str, papers: Dict[str, dict]) -> str:
+        """
+        Merge papers into a topic's papers_info.json.
+
+        Args:
+            topic: The topic directory name
+            papers: Mapping of paper ID to paper information
+
+        Returns:
+            Path of the updated file
+        """
+        self.pending.setdefault(topic, {}).update(papers)
+        done = asyncio.get_running_loop().create_future()
+        self.waiters.setdefault(topic, []).append(done)
+
+        # The write runs in its own task, so a caller cancelled mid-write (e.g.
+        # its SSE client went away) neither strands the other callers in the
+        # batch nor releases the lock while the file is still being written
+        await asyncio.shield(asyncio.ensure_future(self._flush_pending(topic)))
+        return await done
+
+    async def _flush_pending(self, topic: str) -> None:
+        async with self.locks[topic]:
+            # An earlier flush may already have written our papers with its own
+            batch = self.pending.pop(topic, None)
+            if batch is None:
+                return
+            waiters = self.waiters.pop(topic, [])
+            try:
+                file_path = await asyncio.to_thread(self._flush, topic, batch)
+            except Exception as e:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+            else:
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_result(file_path)
+
+    def _flush(self, topic: str, papers: Dict[str, dict]) -> str:
+        path = os.path.join(self.paper_dir, topic)
+        os.makedirs(path, exist_ok=True)
+        file_path = os.path.join(path, "papers_info.json")
+
+        # Try to load existing papers info
+        try:
+            with open(file_path, "r") as json_file:
+                papers_info = json.load(json_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            papers_info = {}
+
+        papers_info.update(papers)
+
+        # Write next to the target and rename over it, so the file is either
+        # the old or the new version, never a half-written one
+        fd, tmp_path = tempfile.mkstemp(dir=path, prefix=".papers_info.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as json_file:
+                json.dump(papers_info, json_file, indent=2)
+                json_file.flush()
+                os.fsync(json_file.fileno())
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        return file_path
+
+
+writer = TopicWriter(PAPER_DIR)
+
+
+def fetch_papers(topic: str, max_results: int) -> Dict[str, dict]:
+    """Search arXiv for a topic and return paper ID -> paper information."""
     # Use arxiv to find the papers
     client = arxiv.Client()
 
@@ -32,41 +112,40 @@ def search_papers(topic: str, max_results: int = 5) -> List[str]:
         query=topic, max_results=max_results, sort_by=arxiv.SortCriterion.Relevance
     )
 
-    papers = client.results(search)
-
-    # Create directory for this topic
-    path = os.path.join(PAPER_DIR, topic.lower().replace(" ", "_"))
-    os.makedirs(path, exist_ok=True)
-
-    file_path = os.path.join(path, "papers_info.json")
-
-    # Try to load existing papers info
-    try:
-        with open(file_path, "r") as json_file:
-            papers_info = json.load(json_file)
-    except (FileNotFoundError, json.JSONDecodeError):
-        papers_info = {}
-
-    # Process each paper and add to papers_info
-    paper_ids = []
-    for paper in papers:
-        paper_ids.append(paper.get_short_id())
-        paper_info = {
+    papers_info = {}
+    for paper in client.results(search):
+        papers_info[paper.get_short_id()] = {
             "title": paper.title,
             "authors": [author.name for author in paper.authors],
             "summary": paper.summary,
             "pdf_url": paper.pdf_url,
             "published": str(paper.published.date()),
         }
-        papers_info[paper.get_short_id()] = paper_info
+    return papers_info
+
+
+@mcp.tool()
+async def search_papers(topic: str, max_results: int = 5) -> List[str]:
+    """
+    Search for papers on arXiv based on a topic and store their information.
+
+    Args:
+        topic: The topic to search for
+        max_results: Maximum number of results to retrieve (default: 5)
+
+    Returns:
+        List of paper IDs found in the search
+    """
+
+    # Query arXiv in a worker thread so other clients aren't blocked meanwhile
+    papers_info = await asyncio.to_thread(fetch_papers, topic, max_results)
 
-    # Save updated papers_info to json file
-    with open(file_path, "w") as json_file:
-        json.dump(papers_info, json_file, indent=2)
+    # Save the papers, merged with any concurrent searches on the same topic
+    file_path = await writer.save(topic.lower().replace(" ", "_"), papers_info)
 
     print(f"Results are saved in: {file_path}")
 
-    return paper_ids
+    return list(papers_info)
 
 
 @mcp.tool()